@@ -1,10 +1,11 @@
-import pandas as pd
+from data_store import read_candles, read_meta
 
-# Load the CSV file
-file_path = "data/BTC-USDT_5m.csv"  # Adjust the path to your file
-df = pd.read_csv(file_path)
+# Load the stored candles
+dataset = ("blofin", "BTC/USDT", "5m")  # Adjust to the dataset you want to inspect
+df = read_candles(*dataset)
 
-# Print column names and data types
+# Print stored metadata, column names and data types
+print("Stored Metadata:", read_meta(*dataset))
 print("Column Names:", df.columns)
 print("Data Types:\n", df.dtypes)
 
@@ -1,23 +1,27 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from chart_rendering import decimated_plot
+from data_store import read_candles
+from execution import EXIT_REASONS, ExecutionModel
 
-# Filepath to the CSV data
-DATA_FILE = "data/BTC-USDT_5m.csv"  # Update this to the path of your data file
+# (exchange, pair, timeframe) of the candles in the data store
+DATASET = ("blofin", "BTC/USDT", "5m")  # Update this to the dataset you want to backtest
+STOP_LOSS_PCT = 0.01  # Example: 1% stop loss, used for position sizing
+R_FACTOR = 2  # Take-profit distance in multiples of the stop distance, as in TradingEnv
 
 
-def load_data(filepath):
+def load_data(dataset, start=None, end=None):
     """
-    Load historical data from a CSV file.
+    Load historical data from the columnar data store.
+    Timestamps and float columns come back already typed.
     """
-    df = pd.read_csv(filepath)
-
-    # Convert timestamp to datetime
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df.set_index("timestamp", inplace=True)
-
-    # Ensure numeric columns are floats
     numeric_cols = ["open", "high", "low", "close", "volume_base"]
-    df[numeric_cols] = df[numeric_cols].astype(float)
+    df = read_candles(*dataset, columns=numeric_cols, start=start, end=end)
+    df.set_index("timestamp", inplace=True)
 
     return df
 
@@ -39,9 +43,110 @@ def simple_moving_average_strategy(df, fast_period=10, slow_period=20):
     return df
 
 
-def backtest_strategy(df, initial_balance=1000, risk_per_trade=100):
+def signal_transitions(signal):
+    """
+    Bars where a long-only strategy driven by `signal` enters and exits.
+    The position is long exactly when the most recent non-zero signal (from bar 1 on) was a buy,
+    so entries/exits are the bars where that forward-filled state flips.
+    """
+    signal = np.asarray(signal).copy()
+    signal[:1] = 0  # The backtest loop starts at bar 1
+    bars = np.arange(len(signal))
+    last_nonzero = np.maximum.accumulate(np.where(signal != 0, bars, -1))
+    long = (last_nonzero >= 0) & (signal[np.maximum(last_nonzero, 0)] == 1)
+    was_long = np.concatenate(([False], long[:-1]))
+    return np.flatnonzero(long & ~was_long), np.flatnonzero(~long & was_long)
+
+
+def run_trades(signal, close, initial_balance=1000, risk_per_trade=100):
+    """
+    Array core of backtest_strategy: returns (final_balance, trade_log records).
+    Entry/exit bars come from signal_transitions; only the trades themselves are walked
+    in Python, with the same arithmetic as backtest_strategy_iterative so results match exactly.
+    """
+    entries, exits = signal_transitions(signal)
+    balance = initial_balance
+    trade_log = []
+
+    for k, entry in enumerate(entries):
+        price = close[entry]
+        risk = risk_per_trade * balance
+        stop_loss = price * (1 - STOP_LOSS_PCT)
+        position_size = risk / (price - stop_loss)
+        if position_size == 0:
+            # A zero-size buy leaves the position flat, so the loop re-buys on every later buy signal
+            balance -= position_size * price
+            for i in np.flatnonzero(signal[entry:] == 1) + entry:
+                trade_log.append({"Type": "BUY", "Price": close[i], "Balance": balance})
+            break
+        balance -= position_size * price
+        trade_log.append({"Type": "BUY", "Price": price, "Balance": balance})
+        if not position_size > 0:
+            break  # A negative/NaN position can never be sold or re-entered
+
+        if k < len(exits):
+            price = close[exits[k]]
+            balance += position_size * price
+            trade_log.append({"Type": "SELL", "Price": price, "Balance": balance})
+
+    return balance, trade_log
+
+
+def run_bracket_trades(df, execution, initial_balance=1000, risk_per_trade=100, r_factor=R_FACTOR):
+    """
+    Signal trades with simulated execution: each entry fills at its bar's close with slippage and the
+    taker fee, then exits at the first touch of its stop (STOP_LOSS_PCT below the fill) or take-profit
+    (r_factor times further above) within the bar range, or at the signal exit, whichever comes first.
+    Sizing is the same as run_trades, so every trade scales the balance by a factor independent of it
+    and the balances are one cumulative product. Returns (final_balance, trade_log records).
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    entries, exits = signal_transitions(df["Signal"].to_numpy())
+    exits = np.concatenate([exits, np.full(len(entries) - len(exits), len(close) - 1)])  # Close what is still open
+
+    entry, unit, stop, target, entry_fee = execution.open_bracket(
+        close[entries], 1, risk_per_trade, STOP_LOSS_PCT, r_factor, high=high[entries], low=low[entries])
+    fills = execution.simulate_trades(df["open"].to_numpy(dtype=np.float64), high, low, close, entries, exits, stop, target)
+    exit_price = fills["exit_price"]
+    exit_fee = unit * exit_price * execution.exit_fee_rate(fills["reason"])
+
+    # `unit` is the position per 1 of balance; each trade's factor is 1 + its net P&L per 1 of balance
+    growth = np.cumprod(1 + unit * (exit_price - entry) - entry_fee - exit_fee)
+    ruined = np.flatnonzero(growth <= 0)
+    n = ruined[0] + 1 if len(ruined) else len(entries)  # No further trades once the balance is wiped out
+    after = initial_balance * growth[:n]
+    before = np.concatenate(([initial_balance], after[:-1]))
+
+    trade_log = []
+    for k in range(n):
+        trade_log.append({"Type": "BUY", "Price": entry[k], "Balance": before[k] * (1 - unit[k] * entry[k] - entry_fee[k]),
+                          "Reason": "SIGNAL", "Bar": entries[k]})
+        trade_log.append({"Type": "SELL", "Price": exit_price[k], "Balance": after[k],
+                          "Reason": EXIT_REASONS[fills["reason"][k]], "Bar": fills["exit_bar"][k]})
+    return (after[-1] if n else initial_balance), trade_log
+
+
+def backtest_strategy(df, initial_balance=1000, risk_per_trade=100, execution=None, r_factor=R_FACTOR):
     """
     Backtest the strategy on historical data.
+    Vectorized equivalent of backtest_strategy_iterative: same final balance and trade log.
+    Pass an execution.ExecutionModel to enforce the stop-loss/take-profit against bar highs/lows
+    and charge fees and slippage (run_bracket_trades); the log then also records each exit's reason.
+    """
+    if execution is not None:
+        balance, trade_log = run_bracket_trades(df, execution, initial_balance, risk_per_trade, r_factor)
+        return balance, pd.DataFrame(trade_log)
+    signal = df["Signal"].to_numpy()
+    close = df["close"].to_numpy(dtype=np.float64)
+    balance, trade_log = run_trades(signal, close, initial_balance, risk_per_trade)
+    return balance, pd.DataFrame(trade_log)
+
+
+def backtest_strategy_iterative(df, initial_balance=1000, risk_per_trade=100):
+    """
+    Reference per-row implementation of backtest_strategy, kept for parity checks.
     Tracks balance, PnL, and other metrics.
     """
     balance = initial_balance
@@ -59,7 +164,7 @@ def backtest_strategy(df, initial_balance=1000, risk_per_trade=100):
         if signal == 1 and position == 0:  # Buy signal
             # Calculate risk and position size
             risk = risk_per_trade * balance
-            stop_loss = price * 0.99  # Example: 1% stop loss
+            stop_loss = price * (1 - STOP_LOSS_PCT)
             position_size = risk / (price - stop_loss)
             position = position_size
             balance -= position_size * price
@@ -76,19 +181,143 @@ def backtest_strategy(df, initial_balance=1000, risk_per_trade=100):
     return balance, trade_log_df
 
 
+def sma_from_cumsum(cumsum, window):
+    """Rolling mean of `window` bars from a cumulative-sum buffer (cumsum[0] == 0); NaN until the window fills."""
+    sma = np.full(len(cumsum) - 1, np.nan)
+    sma[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return sma
+
+
+def sma_signal_matrix(cumsum, grid):
+    """
+    Crossover signals for every (fast, slow) pair as a (params x time) int8 array.
+    Each distinct window's SMA is computed once and shared by every pair that uses it.
+    """
+    smas = {window: sma_from_cumsum(cumsum, window) for window in sorted({w for pair in grid for w in pair})}
+    fast = np.stack([smas[f] for f, _ in grid])
+    slow = np.stack([smas[s] for _, s in grid])
+    signals = np.zeros(fast.shape, dtype=np.int8)  # NaN warm-up bars compare False and stay 0
+    signals[fast > slow] = 1  # Buy signal
+    signals[fast < slow] = -1  # Sell signal
+    return signals
+
+
+def evaluate_signal_matrix(signals, close, initial_balance=1000, risk_per_trade=100):
+    """
+    Final balance and trade count for every row of a (params x time) signal matrix.
+    Trades are found for all rows at once; each completed round trip multiplies the balance
+    by 1 - a + a * exit / entry (a = risk_per_trade / STOP_LOSS_PCT), and a position still open
+    at the end leaves 1 - a of it. Rows where that compounding stops being valid (non-positive
+    balance before a buy) are re-run exactly with run_trades.
+    """
+    signals = signals.copy()
+    signals[:, 0] = 0  # The backtest loop starts at bar 1
+    n_params, n_bars = signals.shape
+    bars = np.arange(n_bars)
+    last_nonzero = np.maximum.accumulate(np.where(signals != 0, bars, -1), axis=1)
+    long = (last_nonzero >= 0) & (np.take_along_axis(signals, np.maximum(last_nonzero, 0), axis=1) == 1)
+    was_long = np.zeros_like(long)
+    was_long[:, 1:] = long[:, :-1]
+
+    entry_rows, entry_bars = np.nonzero(long & ~was_long)
+    exit_rows, exit_bars = np.nonzero(~long & was_long)
+    n_entries = np.bincount(entry_rows, minlength=n_params)
+    n_exits = np.bincount(exit_rows, minlength=n_params)
+
+    # The k-th exit of a row closes the k-th entry of the same row
+    first_entry = np.concatenate(([0], np.cumsum(n_entries)[:-1]))
+    first_exit = np.concatenate(([0], np.cumsum(n_exits)[:-1]))
+    exit_rank = np.arange(len(exit_rows)) - first_exit[exit_rows]
+    entry_price = close[entry_bars[first_entry[exit_rows] + exit_rank]]
+
+    a = risk_per_trade / STOP_LOSS_PCT
+    factors = 1 - a + a * close[exit_bars] / entry_price
+    with np.errstate(divide="ignore", over="ignore"):  # Overflowing rows are invalid and re-run below
+        log_growth = np.bincount(exit_rows, weights=np.log(np.abs(factors)), minlength=n_params)
+        final_balance = initial_balance * np.exp(log_growth)
+    open_at_end = n_entries > n_exits
+    final_balance[open_at_end] *= 1 - a
+
+    invalid = np.bincount(exit_rows, weights=factors <= 0, minlength=n_params) > 0
+    if initial_balance <= 0 or a <= 0:
+        invalid[:] = True
+    for row in np.flatnonzero(invalid):
+        final_balance[row], trade_log = run_trades(signals[row], close, initial_balance, risk_per_trade)
+        n_entries[row] = sum(trade["Type"] == "BUY" for trade in trade_log)
+        n_exits[row] = len(trade_log) - n_entries[row]
+
+    return final_balance, n_entries + n_exits
+
+
+_sweep_cumsum = None
+_sweep_close = None
+
+
+def _init_sweep_worker(cumsum, close):
+    """Process-pool initializer: receive the shared price buffers once per worker."""
+    global _sweep_cumsum, _sweep_close
+    _sweep_cumsum, _sweep_close = cumsum, close
+
+
+def _sweep_chunk(grid, initial_balance, risk_per_trade):
+    signals = sma_signal_matrix(_sweep_cumsum, grid)
+    return evaluate_signal_matrix(signals, _sweep_close, initial_balance, risk_per_trade)
+
+
+def sweep_sma_strategies(df, fast_periods, slow_periods, initial_balance=1000, risk_per_trade=100,
+                         n_jobs=None, chunk_size=64):
+    """
+    Backtest simple_moving_average_strategy for every fast < slow combination in one pass.
+    The close series is summed once; chunks of the grid are evaluated as 2D arrays, across a
+    process pool when n_jobs != 1. Returns a results table ranked by final balance.
+    Moving averages come from differences of one cumulative sum rather than pandas' rolling mean,
+    so where the fast and slow averages are nearly equal the rounding can flip a crossover signal
+    and change which trades are taken; the table is for ranking parameters, not exact replays.
+    Confirm a chosen combination with backtest_strategy.
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(close)))
+    grid = [(fast, slow) for fast in sorted(set(fast_periods)) for slow in sorted(set(slow_periods)) if fast < slow]
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+
+    if n_jobs == 1 or len(chunks) <= 1:
+        _init_sweep_worker(cumsum, close)
+        results = [_sweep_chunk(chunk, initial_balance, risk_per_trade) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count(), initializer=_init_sweep_worker,
+                                 initargs=(cumsum, close)) as pool:
+            results = list(pool.map(_sweep_chunk, chunks, [initial_balance] * len(chunks),
+                                    [risk_per_trade] * len(chunks)))
+
+    final_balance = np.concatenate([balances for balances, _ in results]) if results else np.empty(0)
+    trades = np.concatenate([counts for _, counts in results]) if results else np.empty(0, dtype=int)
+    table = pd.DataFrame({
+        "fast_period": [fast for fast, _ in grid],
+        "slow_period": [slow for _, slow in grid],
+        "final_balance": final_balance,
+        "return_pct": (final_balance / initial_balance - 1) * 100,
+        "trades": trades,
+    })
+    return table.sort_values("final_balance", ascending=False, ignore_index=True)
+
+
 def visualize_results(df, trade_log):
     """
     Visualize backtest results, including signals and trade outcomes.
+    Lines are min/max-decimated to the visible range and recomputed on zoom.
     """
     # Plot price and SMA
     plt.figure(figsize=(14, 8))
-    plt.plot(df.index, df["close"], label="Close Price", color="blue")
-    plt.plot(df.index, df["SMA_Fast"], label="SMA Fast", color="orange")
-    plt.plot(df.index, df["SMA_Slow"], label="SMA Slow", color="green")
+    ax = plt.gca()
+    decimated_plot(ax, df.index, df["close"], label="Close Price", color="blue")
+    decimated_plot(ax, df.index, df["SMA_Fast"], label="SMA Fast", color="orange")
+    decimated_plot(ax, df.index, df["SMA_Slow"], label="SMA Slow", color="green")
 
-    # Mark buy/sell signals
-    buys = df[df["Signal"] == 1]
-    sells = df[df["Signal"] == -1]
+    # Mark the bars where the signal flips, rather than every bar it stays on
+    signal = df["Signal"]
+    flips = signal.ne(signal.shift())
+    buys = df[flips & (signal == 1)]
+    sells = df[flips & (signal == -1)]
     plt.scatter(buys.index, buys["close"], marker="^", color="green", label="Buy Signal", alpha=1)
     plt.scatter(sells.index, sells["close"], marker="v", color="red", label="Sell Signal", alpha=1)
 
@@ -118,7 +347,7 @@ def main():
     """
     # Load historical data
     print("Loading historical data...")
-    df = load_data(DATA_FILE)
+    df = load_data(DATASET)
 
     # Apply strategy
     print("Applying moving average strategy...")
@@ -132,10 +361,24 @@ def main():
     print(f"Final Balance: ${final_balance:.2f}")
     print(trade_log)
 
+    # Same signals with the stop-loss/take-profit enforced and fees/slippage charged
+    print("Backtesting with simulated execution...")
+    final_balance_exec, trade_log_exec = backtest_strategy(df, execution=ExecutionModel())
+    print(f"Final Balance: ${final_balance_exec:.2f}")
+    if trade_log_exec.empty:
+        print("⚠️ No trades were made")
+    else:
+        print(trade_log_exec["Reason"].value_counts())
+
     # Visualize results
     print("Visualizing results...")
     visualize_results(df, trade_log)
 
+    # Rank a grid of SMA windows on the same data
+    print("Sweeping SMA parameters...")
+    sweep = sweep_sma_strategies(df, fast_periods=range(5, 55, 5), slow_periods=range(20, 220, 10))
+    print(sweep.head(10))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+import argparse
+import time
+
+from backtesting import (
+    backtest_strategy,
+    backtest_strategy_iterative,
+    simple_moving_average_strategy,
+    sweep_sma_strategies,
+)
+from synthetic_data import make_synthetic_ohlcv
+
+
+def main():
+    # Parity with the per-row loop is checked by tests/test_backtesting.py
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized backtester.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic bars for the benchmark")
+    parser.add_argument("--loop-rows", type=int, default=50_000, help="Bars for the per-row loop baseline")
+    parser.add_argument("--sweep-rows", type=int, default=100_000, help="Bars for the parameter-sweep benchmark")
+    args = parser.parse_args()
+
+    df = simple_moving_average_strategy(make_synthetic_ohlcv(args.rows))
+    start = time.perf_counter()
+    final_balance, trade_log = backtest_strategy(df, risk_per_trade=0.01)
+    elapsed = time.perf_counter() - start
+    print(f"Vectorized: {args.rows:,} bars, {len(trade_log):,} trades in {elapsed:.3f}s "
+          f"({args.rows / elapsed:,.0f} bars/sec), final balance {final_balance:.2f}")
+
+    loop_df = simple_moving_average_strategy(make_synthetic_ohlcv(args.loop_rows, seed=1))
+    start = time.perf_counter()
+    backtest_strategy_iterative(loop_df, risk_per_trade=0.01)
+    elapsed = time.perf_counter() - start
+    print(f"Per-row loop: {args.loop_rows / elapsed:,.0f} bars/sec")
+
+    sweep_df = make_synthetic_ohlcv(args.sweep_rows)
+    start = time.perf_counter()
+    table = sweep_sma_strategies(sweep_df, range(2, 62, 2), range(10, 410, 10), risk_per_trade=0.001)
+    elapsed = time.perf_counter() - start
+    print(f"Sweep: {len(table):,} (fast, slow) combos on {args.sweep_rows:,} bars in {elapsed:.2f}s "
+          f"({len(table) / elapsed:,.0f} combos/sec)")
+
+
+if __name__ == "__main__":
+    main()
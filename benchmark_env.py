@@ -0,0 +1,117 @@
+import argparse
+import time
+from functools import partial
+
+import numpy as np
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+from portfolio_env import PortfolioArrays, PortfolioEnv
+from shared_market_data import shared_market_arrays
+from synthetic_data import make_synthetic_ohlcv
+from train_rl_agent import make_worker_env
+from trading_env import MarketArrays, TradingEnv
+from vec_trading_env import VecTradingEnv
+
+
+def measure_steps_per_sec(env, n_steps):
+    """Step the env with a fixed buy/hold/sell cycle and return steps per second."""
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        _, _, done, _, _ = env.step(i % 3)
+        if done:
+            env.reset()
+    return n_steps / (time.perf_counter() - start)
+
+
+def measure_vec_steps_per_sec(vec_env, n_steps):
+    """Step a vectorized env and return env-steps per second summed over all episodes."""
+    vec_env.reset()
+    calls = max(1, n_steps // vec_env.num_envs)
+    actions = np.arange(vec_env.num_envs) % 3
+    start = time.perf_counter()
+    for _ in range(calls):
+        vec_env.step(actions)
+        actions = (actions + 1) % 3
+    return calls * vec_env.num_envs / (time.perf_counter() - start)
+
+
+def measure_portfolio_steps_per_sec(env, n_steps, seed=0):
+    """Step a PortfolioEnv with random per-asset actions and return steps per second."""
+    actions = np.random.default_rng(seed).integers(0, 3, size=(1024, env.n_assets))
+    env.reset(seed=seed)
+    start = time.perf_counter()
+    for i in range(n_steps):
+        _, _, done, _, _ = env.step(actions[i % len(actions)])
+        if done:
+            env.reset()
+    return n_steps / (time.perf_counter() - start)
+
+
+def synthetic_universe(n_rows, n_assets):
+    """PortfolioArrays of independent synthetic assets with the 11-column observation layout."""
+    from features import add_features
+
+    frames = {f"SYN{i}/USD": add_features(make_synthetic_ohlcv(n_rows, seed=i), dropna=False) for i in range(n_assets)}
+    return PortfolioArrays.from_frames(frames)
+
+
+def worker_memory_mb(vec_env):
+    """Sum of per-worker RSS and unique (USS) memory in MB, or None when psutil is not installed."""
+    try:
+        import psutil
+    except ImportError:
+        return None, None
+    rss = uss = 0
+    for process in vec_env.processes:
+        info = psutil.Process(process.pid).memory_full_info()
+        rss += info.rss
+        uss += info.uss
+    return rss / 1e6, uss / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TradingEnv step throughput.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic candles in the dataset")
+    parser.add_argument("--steps", type=int, default=50_000, help="Env steps to time per mode")
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1, 8, 64, 256], help="Batch sizes for VecTradingEnv")
+    parser.add_argument("--subproc", type=int, nargs="*", default=[],
+                        help="Worker counts for a SubprocVecEnv scaling report, e.g. --subproc 1 4 16 32")
+    parser.add_argument("--assets", type=int, nargs="*", default=[1, 10, 100], help="Asset counts for PortfolioEnv")
+    parser.add_argument("--portfolio-rows", type=int, default=20_000, help="Synthetic bars per asset for PortfolioEnv")
+    args = parser.parse_args()
+
+    df = make_synthetic_ohlcv(args.rows)
+    results = {}
+    for label, use_arrays in (("DataFrame.iloc", False), ("Array-backed", True)):
+        env = TradingEnv(df, use_arrays=use_arrays)
+        results[label] = measure_steps_per_sec(env, args.steps)
+        print(f"{label:>15}: {results[label]:,.0f} steps/sec")
+
+    print(f"Speedup: {results['Array-backed'] / results['DataFrame.iloc']:.1f}x")
+
+    for n_envs in args.n_envs:
+        vec_env = VecTradingEnv(df, n_envs=n_envs, episode_length=min(2048, args.rows - 1), seed=0)
+        rate = measure_vec_steps_per_sec(vec_env, args.steps)
+        print(f"VecTradingEnv n_envs={n_envs:>4}: {rate:,.0f} steps/sec")
+
+    if args.subproc:
+        market = MarketArrays.from_frame(df)
+        print(f"Dataset: {market.obs.nbytes / 1e6:.1f} MB observation matrix")
+        with shared_market_arrays(market) as market_dir:
+            for n_workers in args.subproc:
+                vec_env = SubprocVecEnv([partial(make_worker_env, market_dir) for _ in range(n_workers)])
+                rate = measure_vec_steps_per_sec(vec_env, args.steps)
+                rss, uss = worker_memory_mb(vec_env)
+                vec_env.close()
+                memory = f"RSS {rss:,.0f} MB, USS {uss:,.0f} MB" if rss is not None else "install psutil for memory"
+                print(f"SubprocVecEnv workers={n_workers:>3}: {rate:,.0f} steps/sec | {memory}")
+
+    for n_assets in args.assets:
+        env = PortfolioEnv(synthetic_universe(args.portfolio_rows, n_assets), leverage=5, episode_length=2048)
+        rate = measure_portfolio_steps_per_sec(env, args.steps)
+        print(f"PortfolioEnv assets={n_assets:>4}: {rate:,.0f} steps/sec ({rate * n_assets:,.0f} asset-steps/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from policy_export import NumpyPolicy, export_policy
+
+# Run in a fresh interpreter: import, load, first decision; prints seconds and peak RSS in MB.
+# VmHWM is reset on exec, unlike ru_maxrss which a child inherits from this (torch-loaded) process.
+COLD_START = """
+import time
+start = time.perf_counter()
+{load}
+policy.predict(obs, deterministic=True)
+elapsed = time.perf_counter() - start
+hwm = [line for line in open("/proc/self/status") if line.startswith("VmHWM")][0]
+print(elapsed, int(hwm.split()[1]) / 1024)
+"""
+LOADERS = {
+    "PPO.load": "from stable_baselines3 import PPO\nimport numpy as np\npolicy = PPO.load({path!r}, device='cpu')\n"
+                "obs = np.zeros(policy.observation_space.shape, dtype=np.float32)",
+    "NumpyPolicy": "from policy_export import NumpyPolicy\nimport numpy as np\npolicy = NumpyPolicy({path!r})\n"
+                   "obs = np.zeros(policy.obs_shape, dtype=np.float32)",
+}
+
+
+def check_parity(model, policy, n_obs=10_000, seed=0):
+    """Share of observations where the exported policy picks the same action as model.predict (batched)."""
+    rng = np.random.default_rng(seed)
+    obs = rng.normal(scale=2.0, size=(n_obs, *policy.obs_shape)).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    actions, _ = policy.predict(obs, deterministic=True)
+    single, _ = policy.predict(obs[0], deterministic=True)
+    assert np.shape(single) == np.shape(model.predict(obs[0], deterministic=True)[0])
+    return float(np.mean(np.isclose(actions, expected, atol=1e-5)))
+
+
+def measure_latency_us(policy, obs, n_calls=2_000):
+    """Median microseconds per single-observation predict."""
+    timings = np.empty(n_calls)
+    for i in range(n_calls):
+        start = time.perf_counter()
+        policy.predict(obs, deterministic=True)
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings) * 1e6)
+
+
+def cold_start(loader, path):
+    code = COLD_START.format(load=LOADERS[loader].format(path=path))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds, rss = map(float, out.stdout.split()[-2:])
+    return seconds, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity and cold-start/latency benchmark for exported policies.")
+    parser.add_argument("--model", default="checkpoints/optuna_best_model.zip")
+    parser.add_argument("--parity-obs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from stable_baselines3 import PPO
+
+    npz_path = export_policy(args.model)
+    model = PPO.load(args.model, device="cpu")
+    policy = NumpyPolicy(npz_path)
+
+    match = check_parity(model, policy, args.parity_obs)
+    print(f"{'✅' if match == 1.0 else '⚠️'} Parity: {match:.4%} of {args.parity_obs:,} actions match model.predict")
+
+    obs = np.zeros(policy.obs_shape, dtype=np.float32)
+    results = {}
+    for loader, runtime in (("PPO.load", model), ("NumpyPolicy", policy)):
+        seconds, rss = cold_start(loader, os.path.abspath(args.model if loader == "PPO.load" else npz_path))
+        results[loader] = {"cold_start_s": seconds, "peak_rss_mb": rss, "predict_us": measure_latency_us(runtime, obs)}
+        print(f"{loader:>12}: cold start {seconds:.2f}s, peak RSS {rss:.0f} MB, "
+              f"predict {results[loader]['predict_us']:.1f} µs")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import make_synthetic_ohlcv
+
+SIZES = [10_000, 100_000, 1_000_000]  # Synthetic bars per dataset
+BATCH_SIZES = [1, 64]  # Observations per predict call
+ENV_STEPS = 20_000
+VEC_ENVS = 64
+PPO_TIMESTEPS = 4_096
+PREDICT_CALLS = 2_000
+THRESHOLD = 0.15  # Default allowed regression (fraction) in compare mode
+
+# Direction of "better" by metric name suffix; everything else is a throughput (higher is better)
+LOWER_IS_BETTER = ("_us", "_mb", "_seconds")
+
+
+def lower_is_better(name):
+    return name.endswith(LOWER_IS_BETTER)
+
+
+def best(values, name):
+    """Least noisy estimate over repeats: the fastest run."""
+    return min(values) if lower_is_better(name) else max(values)
+
+
+def bench_env(n_rows):
+    from benchmark_env import measure_steps_per_sec, measure_vec_steps_per_sec
+    from trading_env import TradingEnv
+    from vec_trading_env import VecTradingEnv
+
+    df = make_synthetic_ohlcv(n_rows)
+    env = TradingEnv(df, render_mode=None)
+    vec_env = VecTradingEnv(df, n_envs=VEC_ENVS, episode_length=min(2048, n_rows - 1), seed=0)
+    return {
+        "steps_per_sec": measure_steps_per_sec(env, ENV_STEPS),
+        "vec_steps_per_sec": measure_vec_steps_per_sec(vec_env, ENV_STEPS * 8),
+    }
+
+
+def bench_ppo(n_rows):
+    """PPO rollout + update throughput on VecTradingEnv, as train_rl_agent.py runs it."""
+    import torch
+    from stable_baselines3 import PPO
+    from vec_trading_env import VecTradingEnv
+
+    torch.set_num_threads(1)  # Comparable across machines with different core counts
+    env = VecTradingEnv(make_synthetic_ohlcv(n_rows), n_envs=8, episode_length=min(2048, n_rows - 1), seed=0)
+    model = PPO("MlpPolicy", env, n_steps=256, batch_size=256, n_epochs=2, seed=0, verbose=0, device="cpu")
+    model.learn(total_timesteps=PPO_TIMESTEPS // 2)  # Warm-up: first rollout pays for allocation and JIT paths
+    start = time.perf_counter()
+    model.learn(total_timesteps=PPO_TIMESTEPS, reset_num_timesteps=False)
+    return {"fps": PPO_TIMESTEPS / (time.perf_counter() - start)}
+
+
+def bench_backtest(n_rows):
+    from backtesting import backtest_strategy, simple_moving_average_strategy
+    from execution import ExecutionModel
+
+    df = simple_moving_average_strategy(make_synthetic_ohlcv(n_rows).set_index("timestamp"))
+    start = time.perf_counter()
+    backtest_strategy(df, risk_per_trade=0.01)
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    backtest_strategy(df, risk_per_trade=0.01, execution=ExecutionModel())
+    filled = time.perf_counter() - start
+    return {"bars_per_sec": n_rows / plain, "execution_bars_per_sec": n_rows / filled}
+
+
+def bench_load(n_rows):
+    """Column-store and CSV read throughput in MB of data files per second."""
+    from data_store import dataset_dir, read_candles, write_candles
+
+    df = make_synthetic_ohlcv(n_rows)
+    root = tempfile.mkdtemp(prefix="bench_store_")
+    try:
+        dataset = ("bench", "SYN/USD", "5m")
+        write_candles(df, *dataset, root=root)
+        directory = dataset_dir(*dataset, root=root)
+        store_mb = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6
+        start = time.perf_counter()
+        read_candles(*dataset, root=root)
+        store_seconds = time.perf_counter() - start
+
+        csv_path = os.path.join(root, "candles.csv")
+        df.to_csv(csv_path, index=False)
+        start = time.perf_counter()
+        pd.read_csv(csv_path, parse_dates=["timestamp"])
+        csv_seconds = time.perf_counter() - start
+        csv_mb = os.path.getsize(csv_path) / 1e6
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {"store_mb_per_sec": store_mb / store_seconds, "csv_mb_per_sec": csv_mb / csv_seconds}
+
+
+def bench_inference(batch_size):
+    """Per-call predict latency of an SB3 PPO policy and its NumPy export (policy_export.py)."""
+    import torch
+    from stable_baselines3 import PPO
+    from policy_export import NumpyPolicy, export_policy
+    from vec_trading_env import VecTradingEnv
+
+    torch.set_num_threads(1)
+    env = VecTradingEnv(make_synthetic_ohlcv(1_000), n_envs=1)
+    model = PPO("MlpPolicy", env, seed=0, verbose=0, device="cpu")
+    directory = tempfile.mkdtemp(prefix="bench_policy_")
+    try:
+        model.save(os.path.join(directory, "model"))
+        export_policy(os.path.join(directory, "model.zip"), os.path.join(directory, "model.npz"))
+        policy = NumpyPolicy(os.path.join(directory, "model.npz"))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    obs = np.random.default_rng(0).normal(size=(batch_size, *env.observation_space.shape)).astype(np.float32)
+    obs = obs[0] if batch_size == 1 else obs
+    results = {}
+    for label, predictor in (("sb3", model), ("numpy", policy)):
+        timings = np.empty(PREDICT_CALLS)
+        for i in range(PREDICT_CALLS):
+            start = time.perf_counter()
+            predictor.predict(obs, deterministic=True)
+            timings[i] = time.perf_counter() - start
+        results[f"{label}_p50_us"] = float(np.percentile(timings, 50) * 1e6)
+        results[f"{label}_p99_us"] = float(np.percentile(timings, 99) * 1e6)
+    return results
+
+
+# name: (function, the sizes it runs at, whether to also trace its peak Python/NumPy memory)
+BENCHMARKS = {
+    "env": (bench_env, "sizes", True),
+    "ppo": (bench_ppo, "sizes", False),
+    "backtest": (bench_backtest, "sizes", True),
+    "load": (bench_load, "sizes", True),
+    "inference": (bench_inference, "batches", False),
+}
+
+
+def peak_memory_mb(function, size):
+    """Peak traced allocation of one run. NumPy buffers are traced; torch's are not, hence opt-in per benchmark."""
+    tracemalloc.start()
+    try:
+        function(size)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def run_suite(names, sizes, batch_sizes, repeat):
+    """Flat {"group/size/metric": value} results, each the best of `repeat` runs."""
+    results = {}
+    for name in names:
+        function, axis, trace_memory = BENCHMARKS[name]
+        for size in (sizes if axis == "sizes" else batch_sizes):
+            runs = [function(size) for _ in range(repeat)]
+            for metric in runs[0]:
+                key = f"{name}/{size}/{metric}"
+                results[key] = best([run[metric] for run in runs], metric)
+            if trace_memory:
+                results[f"{name}/{size}/peak_mb"] = peak_memory_mb(function, size)
+            print(f"⏱️ {name} @ {size:,}: " + ", ".join(
+                f"{metric} {results[f'{name}/{size}/{metric}']:,.1f}" for metric in runs[0]))
+    return results
+
+
+def environment():
+    """What the numbers were measured on; compare warns when it differs from the baseline's."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": pd.Timestamp.now("UTC").isoformat(),
+    }
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """
+    Rows of (metric, baseline, current, change) for metrics in both runs, plus the regressions:
+    throughputs that fell, or latencies/memory that rose, by more than `threshold`.
+    """
+    rows, regressions = [], []
+    for key in sorted(set(current) & set(baseline)):
+        old, new = baseline[key], current[key]
+        change = (new - old) / old if old else 0.0
+        worse = -change if not lower_is_better(key) else change
+        rows.append((key, old, new, change))
+        if worse > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic data and gate regressions.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Synthetic bars per dataset")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES, help="Observations per predict call")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best is kept")
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON; exit 1 if any metric regresses past --threshold")
+    parser.add_argument("--current", default=None, help="With --compare: an existing results JSON instead of running")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed regression as a fraction, e.g. 0.15")
+    args = parser.parse_args()
+
+    if args.current:
+        report = load_results(args.current)
+    else:
+        report = {"environment": environment(), "results": run_suite(args.only, args.sizes, args.batch_sizes, args.repeat)}
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Results written to {args.out}")
+        elif not args.compare:
+            print(json.dumps(report, indent=2))
+
+    if not args.compare:
+        return
+    baseline = load_results(args.compare)
+    for field in ("machine", "processor", "cpu_count", "python"):
+        if baseline["environment"].get(field) != report["environment"].get(field):
+            print(f"⚠️ Baseline {field} differs: {baseline['environment'].get(field)} vs {report['environment'].get(field)}")
+    rows, regressions = compare(report["results"], baseline["results"], args.threshold)
+    for key, old, new, change in rows:
+        flag = "❌" if key in regressions else "  "
+        print(f"{flag} {key:<40} {old:>14,.1f} → {new:>14,.1f} ({change:+.1%})")
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%} across {len(rows)} metrics")
+
+
+if __name__ == "__main__":
+    main()
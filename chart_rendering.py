@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from downsampling import minmax_indices
+
+MAX_CANDLES = 1_500  # Candles drawn for any visible range; the resolution adapts to the range instead
+MAX_LINE_POINTS = 4_000  # Points per matplotlib line (min/max pairs, about two per horizontal pixel)
+CANDLE_RULES = ["1min", "5min", "15min", "30min", "1h", "2h", "4h", "6h", "12h", "1D", "3D", "7D"]
+OHLCV_NAMES = ("open", "high", "low", "close", "volume")
+
+
+def candle_rule(start, end, base, max_candles=MAX_CANDLES):
+    """Finest rule from CANDLE_RULES, no finer than the data, that shows [start, end] in at most max_candles."""
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for rule in CANDLE_RULES:
+        step = pd.Timedelta(rule)
+        if step >= base and span / step <= max_candles:
+            return rule
+    return CANDLE_RULES[-1]
+
+
+def resample_ohlcv(df, rule, names=OHLCV_NAMES):
+    """
+    Aggregate candles of a timestamp-indexed frame into `rule` candles: first open, max high, min low,
+    last close, summed volume. Any other column (indicators) takes its last value in the candle.
+    """
+    open_, high, low, close, volume = names
+    how = {open_: "first", high: "max", low: "min", close: "last", volume: "sum"}
+    agg = {column: how.get(column, "last") for column in df.columns}
+    return df.resample(rule).agg(agg).dropna(subset=[close])  # Empty periods (gaps) produce no candle
+
+
+def visible_ohlcv(df, start=None, end=None, max_candles=MAX_CANDLES, names=OHLCV_NAMES):
+    """
+    Candles of [start, end] at a resolution that fits max_candles, plus the rule used
+    (None when the raw candles already fit).
+    """
+    window = df.loc[start:end]
+    if len(window) <= max_candles:
+        return window, None
+    base = pd.Series(window.index[:1_000]).diff().median()
+    rule = candle_rule(window.index[0], window.index[-1], base, max_candles)
+    return resample_ohlcv(window, rule, names), rule
+
+
+def candlestick_figure(df, lines=(), title="", start=None, end=None, max_candles=MAX_CANDLES, names=OHLCV_NAMES,
+                       template="plotly_dark"):
+    """
+    Plotly candlestick of the visible range resampled to at most max_candles, with `lines`
+    ((column, label, color) overlays) as WebGL Scattergl traces on the same candles.
+    The figure is static: zooming it does not resample. Use interactive_candlestick for that.
+    """
+    import plotly.graph_objects as go
+
+    view, rule = visible_ohlcv(df, start, end, max_candles, names)
+    open_, high, low, close, _ = names
+    fig = go.Figure(data=[go.Candlestick(
+        x=view.index, open=view[open_], high=view[high], low=view[low], close=view[close], name=rule or "Price",
+    )])
+    for column, label, color in lines:
+        fig.add_trace(go.Scattergl(x=view.index, y=view[column], mode="lines", line=dict(color=color, width=1), name=label))
+    fig.update_layout(
+        title=f"{title} ({rule or 'raw'} candles)",
+        template=template,
+        showlegend=True,
+        xaxis_rangeslider_visible=False,  # The slider would embed a second copy of every candle
+    )
+    return fig
+
+
+def interactive_candlestick(df, lines=(), title="", max_candles=MAX_CANDLES, names=OHLCV_NAMES, template="plotly_dark"):
+    """
+    candlestick_figure as a FigureWidget that re-resamples whatever range is zoomed or panned to,
+    so detail appears on zoom while every redraw stays at max_candles. Needs ipywidgets (Jupyter).
+    """
+    import plotly.graph_objects as go
+
+    fig = go.FigureWidget(candlestick_figure(df, lines, title, max_candles=max_candles, names=names, template=template))
+    open_, high, low, close, _ = names
+
+    def on_zoom(layout, x_range):
+        start, end = (None, None) if x_range is None else (pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1]))
+        view, rule = visible_ohlcv(df, start, end, max_candles, names)
+        with fig.batch_update():
+            fig.data[0].update(x=view.index, open=view[open_], high=view[high], low=view[low], close=view[close],
+                               name=rule or "Price")
+            for trace, (column, _, _) in zip(fig.data[1:], lines):
+                trace.update(x=view.index, y=view[column])
+            fig.layout.title.text = f"{title} ({rule or 'raw'} candles)"
+
+    fig.layout.on_change(on_zoom, "xaxis.range")
+    return fig
+
+
+def decimated_plot(ax, x, y, max_points=MAX_LINE_POINTS, **kwargs):
+    """
+    ax.plot of the min/max envelope of (x, y) within max_points, re-decimated from the full series
+    whenever the x limits change, so zooming in reveals the raw points. Returns the Line2D.
+    """
+    import matplotlib.dates as mdates
+
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    positions = mdates.date2num(x) if np.issubdtype(x.dtype, np.datetime64) else x
+    index = minmax_indices(y, max_points)
+    (line,) = ax.plot(x[index], y[index], **kwargs)
+
+    def on_xlim(ax):
+        lo, hi = ax.get_xlim()
+        first = max(int(np.searchsorted(positions, lo)) - 1, 0)
+        last = min(int(np.searchsorted(positions, hi)) + 1, len(x))
+        index = first + minmax_indices(y[first:last], max_points)
+        line.set_data(x[index], y[index])
+
+    ax.callbacks.connect("xlim_changed", on_xlim)
+    return line
@@ -1,10 +1,19 @@
+import asyncio
 import ccxt
+import ccxt.async_support as ccxt_async
 import pandas as pd
+import random
 import time
 import os
+from data_store import append_candles, last_timestamp
+from instrumentation import count, timed
 
 BASE_DIR = r"C:\Users\erikn\Desktop\Trading Agents Swarm 3.10\Bot's"
 DATA_DIR = os.path.join(BASE_DIR, "data")
+STORE_DIR = os.path.join(DATA_DIR, "store")
+HISTORY_DAYS = 365  # How far back to start when a pair has no stored candles yet
+MAX_CONCURRENT_PAIRS = 16  # Pair downloads in flight at once; the token bucket caps the request rate
+MAX_RETRIES = 5
 os.makedirs(DATA_DIR, exist_ok=True)
 
 exchange = ccxt.kraken({
@@ -19,23 +28,142 @@ def fetch_kraken_pairs():
     print(f"Found {len(usd_pairs)} USD pairs: {usd_pairs}")
     return usd_pairs
 
+def ohlcv_to_frame(ohlcv):
+    return pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
+
 def fetch_historical_data(pair, timeframe="5m", since=None, limit=1000):
     print(f"Fetching data for {pair}...")
     try:
         ohlcv = exchange.fetch_ohlcv(pair, timeframe=timeframe, since=since, limit=limit)
-        df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
+        df = ohlcv_to_frame(ohlcv)
         df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
         return df
     except Exception as e:
         print(f"Error fetching data for {pair}: {e}")
         return None
 
+def sync_start(exchange, pair, timeframe, root):
+    """`since` for the first page: just after the newest stored candle, or HISTORY_DAYS back."""
+    last = last_timestamp(exchange.id, pair, timeframe, root)
+    return last + 1 if last is not None else exchange.milliseconds() - HISTORY_DAYS * 86_400_000
+
+def store_page(ohlcv, since, exchange, pair, timeframe, root):
+    """
+    Commit the closed candles of one page. Returns (added, next_since, caught_up);
+    next_since is None when the page held no closed candles.
+    """
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    now = exchange.milliseconds()
+    closed = [candle for candle in ohlcv if candle[0] >= since and candle[0] + timeframe_ms <= now]
+    if not closed:
+        return 0, None, True
+    added = append_candles(ohlcv_to_frame(closed), exchange.id, pair, timeframe, root)
+    caught_up = closed[-1][0] + 2 * timeframe_ms > now  # The next candle has not closed yet
+    return added, closed[-1][0] + 1, caught_up
+
+def sync_pair(pair, timeframe="5m", exchange=exchange, root=STORE_DIR, limit=1000):
+    """
+    Incrementally download closed candles for one pair into the data store.
+    Resumes after the last stored timestamp and paginates forward with `since` until
+    the present; each page is committed before the next request, so a crash loses at most one page.
+    Returns the number of new candles stored.
+    """
+    since = sync_start(exchange, pair, timeframe, root)
+    added = 0
+
+    while since is not None:
+        ohlcv = exchange.fetch_ohlcv(pair, timeframe=timeframe, since=since, limit=limit)
+        page_added, next_since, caught_up = store_page(ohlcv, since, exchange, pair, timeframe, root)
+        added += page_added
+        if next_since is not None:
+            print(f"{pair}: stored through {pd.to_datetime(next_since - 1, unit='ms')} ({added} new)")
+        since = None if caught_up else next_since
+
+    return added
+
+class TokenBucket:
+    """Request budget shared by every download task: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+@timed("exchange_fetch_ohlcv_seconds", "One OHLCV page including rate-limit waits and retries")
+async def fetch_ohlcv_with_retry(exchange, bucket, pair, timeframe, since, limit, max_retries=MAX_RETRIES):
+    """Fetch one page under the shared budget, backing off exponentially on 429s and network errors."""
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        try:
+            return await exchange.fetch_ohlcv(pair, timeframe=timeframe, since=since, limit=limit)
+        except ccxt.NetworkError as e:  # Includes RateLimitExceeded, DDoSProtection and RequestTimeout
+            if attempt == max_retries:
+                raise
+            count("exchange_retries_total")
+            delay = (2 ** attempt) * exchange.rateLimit / 1000 * (1 + random.random())
+            print(f"{pair}: {type(e).__name__} ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def sync_pair_async(pair, exchange, bucket, timeframe="5m", root=STORE_DIR, limit=1000):
+    """Async counterpart of sync_pair: same resumable pagination, requests go through the token bucket."""
+    since = sync_start(exchange, pair, timeframe, root)
+    added = 0
+
+    while since is not None:
+        ohlcv = await fetch_ohlcv_with_retry(exchange, bucket, pair, timeframe, since, limit)
+        page_added, next_since, caught_up = store_page(ohlcv, since, exchange, pair, timeframe, root)
+        added += page_added
+        since = None if caught_up else next_since
+
+    return added
+
+async def sync_all_pairs_async(pairs, timeframe="5m", root=STORE_DIR, exchange=None, max_concurrency=MAX_CONCURRENT_PAIRS):
+    """
+    Download every pair concurrently, sharing one token bucket sized to the exchange's rate limit.
+    Returns {pair: new candle count or the exception that stopped it}.
+    """
+    owns_exchange = exchange is None
+    if owns_exchange:
+        exchange = ccxt_async.kraken({"rateLimit": 3000, "enableRateLimit": False})  # The bucket does the throttling
+    bucket = TokenBucket(rate=1000 / exchange.rateLimit)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = {}
+    started = time.monotonic()
+
+    async def run(pair):
+        async with semaphore:
+            try:
+                results[pair] = await sync_pair_async(pair, exchange, bucket, timeframe, root)
+                status = f"+{results[pair]} candles"
+            except Exception as e:
+                results[pair] = e
+                status = f"failed: {e}"
+        print(f"[{len(results)}/{len(pairs)}] {pair}: {status} ({time.monotonic() - started:.0f}s elapsed)")
+
+    try:
+        await asyncio.gather(*(run(pair) for pair in pairs))
+    finally:
+        if owns_exchange:
+            await exchange.close()
+    return results
+
 if __name__ == "__main__":
     pairs = fetch_kraken_pairs()
-    for pair in pairs:
-        df = fetch_historical_data(pair)
-        if df is not None:
-            filename = os.path.join(DATA_DIR, f"{pair.replace('/', '-')}.csv")
-            df.to_csv(filename, index=False)
-            print(f"Saved data for {pair} to {filename}")
-        time.sleep(exchange.rateLimit / 1000)
+    results = asyncio.run(sync_all_pairs_async(pairs))
+    failed = [pair for pair, result in results.items() if isinstance(result, Exception)]
+    print(f"Synced {len(pairs) - len(failed)}/{len(pairs)} pairs")
+    if failed:
+        print(f"Failed (safe to rerun, the next sync resumes from the stored data): {failed}")
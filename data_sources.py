@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, read_columns
+from features import FEATURE_SPEC, compute_features, spec_lookback, warmup_bars
+from trading_env import MarketArrays
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+
+class EpisodeSampler:
+    """
+    Draws episode start rows so that [start, start + episode_length] stays inside one segment
+    (one pair's history) and past its first min_start rows. "random" samples uniformly over every
+    valid start; "stratified" splits the valid starts into n_strata contiguous blocks and visits them
+    in shuffled rounds, so consecutive episodes cover different market regimes.
+    """
+
+    def __init__(self, segments, episode_length, mode="random", min_start=0, n_strata=16):
+        if mode not in ("random", "stratified"):
+            raise ValueError(f"❌ ERROR: Unknown start mode {mode!r}, expected 'random' or 'stratified'")
+        lows, counts = [], []
+        for offset, length in segments:
+            count = length - 1 - episode_length - min_start + 1
+            if count > 0:
+                lows.append(offset + min_start)
+                counts.append(count)
+        if not counts:
+            raise ValueError(f"❌ ERROR: No segment is long enough for {episode_length}-bar episodes")
+        self.lows = np.array(lows, dtype=np.int64)
+        self.ends = np.cumsum(counts)  # Valid starts laid end to end across segments
+        self.begins = self.ends - np.array(counts)
+        self.total = int(self.ends[-1])
+        self.episode_length = episode_length
+        self.mode = mode
+        self.n_strata = min(n_strata, self.total)
+        self._strata = []
+
+    def _next_strata(self, n, rng):
+        strata = []
+        while len(strata) < n:
+            if not self._strata:
+                self._strata = list(rng.permutation(self.n_strata))
+            strata.append(self._strata.pop())
+        return np.array(strata)
+
+    def sample(self, n, rng):
+        """n start rows (global indices) drawn with the given numpy Generator."""
+        if self.mode == "random":
+            k = rng.integers(0, self.total, size=n)
+        else:
+            strata = self._next_strata(n, rng)
+            lo = strata * self.total // self.n_strata
+            hi = (strata + 1) * self.total // self.n_strata
+            k = lo + (rng.random(n) * (hi - lo)).astype(np.int64)
+        segment = np.searchsorted(self.ends, k, side="right")
+        return self.lows[segment] + k - self.begins[segment]
+
+
+class ArraySource:
+    """Episodes served as zero-copy row windows of one in-memory or memory-mapped MarketArrays."""
+
+    def __init__(self, market):
+        self.market = market
+        self.segments = [(0, len(market))]
+        self.min_start = 0
+
+    def __len__(self):
+        return len(self.market)
+
+    @property
+    def n_features(self):
+        return self.market.obs.shape[1]
+
+    def window(self, start, stop):
+        return self.market.rows(start, stop)
+
+
+class StoreSource:
+    """
+    Episodes served lazily from the data store: OHLCV columns of every dataset stay memory-mapped and
+    each window's indicators are computed on demand from the window plus a warm-up prefix, so memory
+    depends on the episode length rather than on how many years and pairs are stored.
+    `holdout` leaves the most recent share of each dataset out of every window, for evaluation.
+    """
+
+    def __init__(self, datasets, spec=FEATURE_SPEC, root=STORE_DIR, holdout=0.0):
+        self.datasets = list(datasets)
+        self.spec = spec
+        self.columns = [read_columns(*dataset, columns=OHLCV, root=root) for dataset in self.datasets]
+        lengths = [int(len(columns["close"]) * (1 - holdout)) for columns in self.columns]
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        self.segments = list(zip(offsets.tolist(), lengths))
+        self.offsets = offsets
+        self.warmup = warmup_bars(spec)
+        self.min_start = spec_lookback(spec)  # Earlier rows have NaN indicators
+
+    def __len__(self):
+        return sum(length for _, length in self.segments)
+
+    @property
+    def n_features(self):
+        return len(OHLCV) + len(self.spec)
+
+    def window(self, start, stop):
+        """Rows [start, stop) of the concatenated datasets; a window may not span two datasets."""
+        i = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        lo = start - self.offsets[i]
+        hi = lo + (stop - start)
+        if hi > self.segments[i][1]:
+            raise ValueError(f"❌ ERROR: Window [{start}, {stop}) crosses the end of {self.datasets[i]}")
+
+        first = max(0, lo - self.warmup)
+        frame = pd.DataFrame({name: np.asarray(self.columns[i][name][first:hi]) for name in OHLCV})
+        features = compute_features(frame, self.spec).to_numpy()
+        obs = np.column_stack([frame.to_numpy(), features])[lo - first:]
+        prices = {name: frame[name].to_numpy()[lo - first:] for name in ("open", "high", "low", "close")}
+        return MarketArrays(obs, **prices)
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+STORE_DIR = os.path.join("data", "store")
+META_FILE = "meta.json"
+
+
+def dataset_dir(exchange, pair, timeframe, root=STORE_DIR):
+    """Directory holding the columns for one (exchange, pair, timeframe) dataset."""
+    return os.path.join(root, exchange, pair.replace("/", "-"), timeframe)
+
+
+def to_epoch_ms(timestamps):
+    """Convert datetimes, date strings or epoch-ms integers to int64 milliseconds (UTC)."""
+    series = pd.Series(timestamps)
+    if pd.api.types.is_integer_dtype(series):
+        return series.to_numpy(dtype=np.int64)
+    parsed = pd.to_datetime(series, utc=True).dt.tz_localize(None)
+    return parsed.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+
+def _bound_to_ms(value):
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return int(to_epoch_ms([value])[0])
+
+
+def read_meta(exchange, pair, timeframe, root=STORE_DIR):
+    """Return the dataset metadata ({"rows": n, "columns": {name: dtype}}) or None if it does not exist."""
+    path = os.path.join(dataset_dir(exchange, pair, timeframe, root), META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_meta(directory, meta):
+    """Replace meta.json atomically; the row count in it is what readers trust."""
+    tmp_path = os.path.join(directory, META_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def _frame_to_columns(df):
+    """Typed column arrays for a candle frame: int64 ms timestamps plus every numeric/bool column."""
+    columns = {"timestamp": to_epoch_ms(df["timestamp"])}
+    for name in df.columns:
+        if name == "timestamp":
+            continue
+        values = df[name].to_numpy()
+        if values.dtype.kind in "biuf":
+            columns[name] = values.astype(np.float64) if values.dtype.kind in "iu" else values
+        else:
+            print(f"⚠️ Skipping non-numeric column {name!r} ({values.dtype})")
+    return columns
+
+
+def write_candles(df, exchange, pair, timeframe, root=STORE_DIR):
+    """
+    Persist a candle frame as raw little-endian column files plus meta.json.
+    Rows are sorted and deduplicated by timestamp; any existing data for the key is replaced.
+    """
+    df = df.assign(_ts=to_epoch_ms(df["timestamp"])).sort_values("_ts").drop_duplicates("_ts", keep="last")
+    columns = _frame_to_columns(df.drop(columns="_ts"))
+    directory = dataset_dir(exchange, pair, timeframe, root)
+    os.makedirs(directory, exist_ok=True)
+
+    for name, values in columns.items():
+        tmp_path = os.path.join(directory, f"{name}.bin.tmp")
+        np.ascontiguousarray(values).tofile(tmp_path)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.bin"))
+
+    meta = {"rows": len(df), "columns": {name: values.dtype.str for name, values in columns.items()}}
+    _write_meta(directory, meta)
+    return meta
+
+
+def last_timestamp(exchange, pair, timeframe, root=STORE_DIR):
+    """Epoch-ms timestamp of the newest stored candle, or None when nothing is stored yet."""
+    meta = read_meta(exchange, pair, timeframe, root)
+    if meta is None or meta["rows"] == 0:
+        return None
+    return int(read_columns(exchange, pair, timeframe, ["timestamp"], root=root)["timestamp"][-1])
+
+
+def append_candles(df, exchange, pair, timeframe, root=STORE_DIR):
+    """
+    Append candles newer than the last stored timestamp and return how many rows were added.
+    Column files are truncated to the committed row count before writing and meta.json is
+    replaced last, so a crash mid-append leaves the previous state intact and the next call resumes.
+    """
+    meta = read_meta(exchange, pair, timeframe, root)
+    if meta is None:
+        return write_candles(df, exchange, pair, timeframe, root)["rows"]
+
+    df = df.assign(_ts=to_epoch_ms(df["timestamp"])).sort_values("_ts").drop_duplicates("_ts", keep="last")
+    last = last_timestamp(exchange, pair, timeframe, root)
+    if last is not None:
+        df = df[df["_ts"] > last]
+    if df.empty:
+        return 0
+
+    columns = _frame_to_columns(df.drop(columns="_ts"))
+    if set(columns) != set(meta["columns"]):
+        raise ValueError(f"❌ Column mismatch: stored {list(meta['columns'])}, got {list(columns)}")
+
+    directory = dataset_dir(exchange, pair, timeframe, root)
+    rows = meta["rows"]
+    for name, dtype in meta["columns"].items():
+        values = np.ascontiguousarray(columns[name], dtype=np.dtype(dtype))
+        with open(os.path.join(directory, f"{name}.bin"), "r+b") as f:
+            f.truncate(rows * values.itemsize)  # Drop bytes left by an interrupted append
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    meta["rows"] = rows + len(df)
+    _write_meta(directory, meta)
+    return len(df)
+
+
+def read_columns(exchange, pair, timeframe, columns=None, start=None, end=None, root=STORE_DIR):
+    """
+    Memory-map the requested columns, sliced to start <= timestamp < end.
+    Returns a dict of read-only arrays; timestamps are int64 epoch milliseconds.
+    """
+    meta = read_meta(exchange, pair, timeframe, root)
+    if meta is None:
+        raise FileNotFoundError(f"❌ No stored candles for {exchange} {pair} {timeframe} under {root}")
+    directory = dataset_dir(exchange, pair, timeframe, root)
+    rows = meta["rows"]
+
+    def open_column(name):
+        dtype = np.dtype(meta["columns"][name])
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+
+    names = list(meta["columns"]) if columns is None else list(columns)
+    missing = [name for name in names if name not in meta["columns"]]
+    if missing:
+        raise KeyError(f"❌ Columns {missing} not stored. Available columns: {list(meta['columns'])}")
+
+    lo, hi = 0, rows
+    if start is not None or end is not None:
+        timestamps = open_column("timestamp")
+        if start is not None:
+            lo = int(np.searchsorted(timestamps, _bound_to_ms(start), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(timestamps, _bound_to_ms(end), side="left"))
+    return {name: open_column(name)[lo:hi] for name in names}
+
+
+@timed("read_candles_seconds")
+def read_candles(exchange, pair, timeframe, columns=None, start=None, end=None, root=STORE_DIR):
+    """Load stored candles as a DataFrame with a datetime "timestamp" column first."""
+    if columns is not None and "timestamp" not in columns:
+        columns = ["timestamp"] + list(columns)
+    data = read_columns(exchange, pair, timeframe, columns, start, end, root)
+    df = pd.DataFrame({name: np.asarray(values) for name, values in data.items()})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def import_csv(filepath, exchange, pair, timeframe, root=STORE_DIR):
+    """One-off migration of an existing per-pair CSV into the store."""
+    df = pd.read_csv(filepath)
+    meta = write_candles(df, exchange, pair, timeframe, root)
+    print(f"✅ Imported {meta['rows']} rows from {filepath} into {dataset_dir(exchange, pair, timeframe, root)}")
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a candle CSV into the columnar data store.")
+    parser.add_argument("csv", help="Path to the CSV file, e.g. data/BTC-USD.csv")
+    parser.add_argument("--exchange", default="kraken")
+    parser.add_argument("--pair", required=True, help="Market symbol, e.g. BTC/USD")
+    parser.add_argument("--timeframe", default="5m")
+    parser.add_argument("--root", default=STORE_DIR)
+    args = parser.parse_args()
+    import_csv(args.csv, args.exchange, args.pair, args.timeframe, args.root)
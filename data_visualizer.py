@@ -1,17 +1,27 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from chart_rendering import candlestick_figure, decimated_plot, interactive_candlestick
+from data_store import read_candles
+from features import add_features, cache_name
 
-# Filepath to the CSV data
-DATA_FILE = "data/BTC-USDT_5m.csv"  # Update this to the path of your data file
+# (exchange, pair, timeframe) of the candles in the data store
+DATASET = ("blofin", "BTC/USDT", "5m")  # Update this to the dataset you want to plot
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")  # Names after load_and_clean_data's rename
+SMA_LINES = [("trend_sma_fast", "SMA Fast", "orange"), ("trend_sma_slow", "SMA Slow", "green")]
 
 
-def load_and_clean_data(filepath):
+def load_and_clean_data(dataset, start=None, end=None):
     """
-    Load data from a CSV file, clean it, and prepare it for analysis.
+    Load data from the columnar data store and prepare it for analysis.
+    Only the plotted columns are read, already typed; indicators come from the shared feature cache.
     """
-    # Load the data
-    df = pd.read_csv(filepath)
+    # Load the data; indicators are computed over the full history so the window starts warmed up
+    df = read_candles(*dataset, columns=["open", "high", "low", "close", "volume_base"])
+    df = add_features(df, name=cache_name(dataset), dropna=False)
+    if start is not None:
+        df = df[df["timestamp"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["timestamp"] < pd.Timestamp(end)]
 
     # Rename columns for readability
     df.rename(
@@ -26,33 +36,26 @@ def load_and_clean_data(filepath):
         inplace=True,
     )
 
-    # Drop unnecessary columns
-    df.drop(columns=["trade_count", "turnover_quote", "is_complete"], inplace=True)
-
-    # Convert timestamp to datetime and set as index
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    # Set timestamp as index
     df.set_index("Timestamp", inplace=True)
 
-    # Ensure all numeric columns are floats
-    numeric_cols = ["Open", "High", "Low", "Close", "Volume"]
-    df[numeric_cols] = df[numeric_cols].astype(float)
-
     return df
 
 
 def visualize_with_matplotlib(df):
     """
     Visualize price and technical indicators using Matplotlib.
+    Lines are min/max-decimated to the visible range and recomputed on zoom (chart_rendering.decimated_plot).
     """
     # Plot close price with SMA indicators
     plt.figure(figsize=(14, 8))
-    plt.plot(df.index, df["Close"], label="Close Price", color="blue", linewidth=1)
+    ax = plt.gca()
+    decimated_plot(ax, df.index, df["Close"], label="Close Price", color="blue", linewidth=1)
 
     # Add SMA indicators (if present)
-    if "trend_sma_fast" in df.columns:
-        plt.plot(df.index, df["trend_sma_fast"], label="SMA Fast", color="orange", linewidth=1)
-    if "trend_sma_slow" in df.columns:
-        plt.plot(df.index, df["trend_sma_slow"], label="SMA Slow", color="green", linewidth=1)
+    for column, label, color in SMA_LINES:
+        if column in df.columns:
+            decimated_plot(ax, df.index, df[column], label=label, color=color, linewidth=1)
 
     # Add title, legend, and grid
     plt.title("BTC-USDT Price with SMA Indicators", fontsize=16)
@@ -65,7 +68,7 @@ def visualize_with_matplotlib(df):
     # Plot RSI (if present)
     if "momentum_rsi" in df.columns:
         plt.figure(figsize=(14, 4))
-        plt.plot(df.index, df["momentum_rsi"], label="RSI", color="purple")
+        decimated_plot(plt.gca(), df.index, df["momentum_rsi"], label="RSI", color="purple")
         plt.axhline(70, color="red", linestyle="--", label="Overbought")
         plt.axhline(30, color="green", linestyle="--", label="Oversold")
         plt.title("Relative Strength Index (RSI)", fontsize=16)
@@ -76,42 +79,23 @@ def visualize_with_matplotlib(df):
         plt.show()
 
 
-def visualize_with_plotly(df):
+def visualize_with_plotly(df, interactive=False, start=None, end=None):
     """
     Create an interactive candlestick chart with Plotly.
+    Candles are OHLC-resampled to at most chart_rendering.MAX_CANDLES for the visible range and the
+    SMA lines are WebGL traces. With interactive=True (Jupyter) the returned FigureWidget re-resamples
+    on every zoom/pan. Otherwise a static figure of [start, end] opens in the browser: zooming it only
+    magnifies the candles it was built with, so pass a narrower start/end to see finer candles.
     """
-    # Create a candlestick chart
-    fig = go.Figure(data=[go.Candlestick(
-        x=df.index,
-        open=df["Open"],
-        high=df["High"],
-        low=df["Low"],
-        close=df["Close"],
-        name="BTC-USDT"
-    )])
-
-    # Add SMA lines (if present)
-    if "trend_sma_fast" in df.columns:
-        fig.add_trace(go.Scatter(
-            x=df.index, y=df["trend_sma_fast"],
-            mode="lines", line=dict(color="orange", width=1),
-            name="SMA Fast"
-        ))
-    if "trend_sma_slow" in df.columns:
-        fig.add_trace(go.Scatter(
-            x=df.index, y=df["trend_sma_slow"],
-            mode="lines", line=dict(color="green", width=1),
-            name="SMA Slow"
-        ))
-
-    # Update layout
-    fig.update_layout(
-        title="BTC-USDT Candlestick Chart with SMA",
-        xaxis_title="Timestamp",
-        yaxis_title="Price (USDT)",
-        template="plotly_dark",
-        showlegend=True
-    )
+    lines = [line for line in SMA_LINES if line[0] in df.columns]
+    title = "BTC-USDT Candlestick Chart with SMA"
+    if interactive:
+        fig = interactive_candlestick(df, lines, title, names=PRICE_COLUMNS)
+    else:
+        fig = candlestick_figure(df, lines, title, start=start, end=end, names=PRICE_COLUMNS)
+    fig.update_layout(xaxis_title="Timestamp", yaxis_title="Price (USDT)")
+    if interactive:
+        return fig
 
     # Show the chart
     fig.show()
@@ -123,7 +107,7 @@ def main():
     """
     # Load and clean the data
     print("Loading and cleaning data...")
-    df = load_and_clean_data(DATA_FILE)
+    df = load_and_clean_data(DATASET)
 
     # Check if data was loaded successfully
     if df is not None:
@@ -138,7 +122,7 @@ def main():
         print("Visualizing with Plotly...")
         visualize_with_plotly(df)
     else:
-        print("Failed to load data. Please check the file path and try again.")
+        print("Failed to load data. Please check the dataset key and try again.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def _as_float(x):
+    """Numeric view of an x axis; datetimes become int64 nanoseconds."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(y, n_out):
+    """
+    Indices of the minimum and maximum of each of n_out // 2 equal buckets, in order.
+    Keeps every spike visible at a fixed point budget; one reshape, no Python loop over buckets.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)  # Ceiling; the last bucket takes the remainder
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1)
+    highs = offsets + np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1)
+    valid = offsets < n
+    return np.unique(np.concatenate([lows[valid], highs[valid], [0, n - 1]]))
+
+
+def lttb_indices(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last point and, from each of n_out - 2 buckets,
+    the point forming the largest triangle with the previous pick and the next bucket's average.
+    Preserves the visual shape of a line far better than striding.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else _as_float(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # Bucket bounds between the end points
+    next_hi = np.append(edges[2:], n)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        avg_x = x[hi:next_hi[i]].mean()
+        avg_y = y[hi:next_hi[i]].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_lttb_indices(y, n_out, x=None, ratio=4):
+    """
+    MinMaxLTTB: min/max preselection down to ratio × n_out points, then LTTB on those.
+    Same picture as plain LTTB at a fraction of the cost on very long series.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= n_out * ratio:
+        return lttb_indices(y, n_out, x)
+    candidates = minmax_indices(y, n_out * ratio)
+    x = candidates if x is None else np.asarray(x)[candidates]
+    return candidates[lttb_indices(y[candidates], n_out, x)]
+
+
+def decimate(x, y, n_out, method="minmax_lttb"):
+    """(x, y) reduced to at most about n_out points with the chosen method."""
+    if method == "minmax":
+        index = minmax_indices(y, n_out)
+    elif method == "lttb":
+        index = lttb_indices(y, n_out, x)
+    elif method == "minmax_lttb":
+        index = minmax_lttb_indices(y, n_out, x)
+    else:
+        raise ValueError(f"❌ ERROR: Unknown decimation method {method!r}")
+    return np.asarray(x)[index], np.asarray(y)[index]
@@ -0,0 +1,122 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from data_store import read_candles
+from features import add_features, cache_name
+from metrics import compute_metrics
+from policy_export import load_policy
+from shared_market_data import attach_market_arrays, shared_market_arrays
+from trading_env import MarketArrays
+from vec_trading_env import VecTradingEnv
+
+DATASET = ("kraken", "BTC/USD", "5m")
+CHECKPOINT_PATTERNS = ["models/*.zip", "checkpoints/*.zip"]
+N_WINDOWS = 32
+WINDOW_LENGTH = 2_016  # One week of 5m bars
+INITIAL_BALANCE = 100
+
+
+def make_windows(n_rows, n_windows=N_WINDOWS, length=WINDOW_LENGTH):
+    """Evenly spaced window starts covering the whole history."""
+    return np.linspace(0, n_rows - 2 - length, n_windows).astype(np.int64)
+
+
+def run_windows(policy, env, starts, length):
+    """
+    Run the deterministic policy over every window at once (one env per window).
+    Returns the metrics.compute_metrics dict with one value per window.
+    """
+    obs = env.reset_windows(starts, length)
+    for _ in range(1, length):  # Stop one bar short of episode_end so the env never auto-resets
+        actions, _ = policy.predict(obs, deterministic=True)
+        obs, _, _, _ = env.step(actions)
+    return compute_metrics(env.equity[:length], env.positions[:length], env.periods_per_year)
+
+
+def evaluate_task(market_dir, checkpoint, starts, length):
+    """Worker: evaluate one checkpoint over a batch of windows of the shared market arrays."""
+    try:
+        import torch
+        torch.set_num_threads(1)  # Parallelism comes from the pool
+    except ImportError:
+        pass  # Exported NumPy policies do not need torch
+    try:
+        policy = load_policy(checkpoint)
+        env = VecTradingEnv(attach_market_arrays(market_dir), n_envs=len(starts), initial_balance=INITIAL_BALANCE,
+                            timeframe=DATASET[2])
+        start = time.perf_counter()
+        metrics = run_windows(policy, env, starts, length)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        return [{"checkpoint": checkpoint, "error": repr(e)}]
+    steps_per_sec = (length - 1) * len(starts) / elapsed
+    return [
+        {"checkpoint": checkpoint, "window_start": int(s), **{name: values[i].item() for name, values in metrics.items()},
+         "steps_per_sec": steps_per_sec}
+        for i, s in enumerate(starts)
+    ]
+
+
+def summarize(rows):
+    """One line per checkpoint: mean return/Sharpe/Sortino over windows, worst drawdown, total trades."""
+    df = pd.DataFrame(rows)
+    if "error" not in df:
+        df["error"] = np.nan
+    failed = df[df["error"].notna()].groupby("checkpoint")["error"].first()
+    ok = df[df["error"].isna()]
+    if ok.empty:
+        table = pd.DataFrame(columns=["total_return", "sharpe", "sortino", "max_drawdown", "exposure", "trades", "steps_per_sec"])
+    else:
+        table = ok.groupby("checkpoint").agg(
+            total_return=("total_return", "mean"),
+            sharpe=("sharpe", "mean"),
+            sortino=("sortino", "mean"),
+            max_drawdown=("max_drawdown", "max"),
+            exposure=("exposure", "mean"),
+            trades=("trades", "sum"),
+            steps_per_sec=("steps_per_sec", "mean"),
+        ).sort_values("sharpe", ascending=False)
+    return table, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate many checkpoints over many data windows in parallel.")
+    parser.add_argument("checkpoints", nargs="*", help=f"Checkpoint zips (default: {' '.join(CHECKPOINT_PATTERNS)})")
+    parser.add_argument("--windows", type=int, default=N_WINDOWS)
+    parser.add_argument("--window-length", type=int, default=WINDOW_LENGTH)
+    parser.add_argument("--windows-per-task", type=int, default=None, help="Split each checkpoint's windows into tasks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--csv", default=None, help="Also write the per-window results here")
+    args = parser.parse_args()
+
+    checkpoints = args.checkpoints or sorted(p for pattern in CHECKPOINT_PATTERNS for p in glob.glob(pattern))
+    df = add_features(read_candles(*DATASET), name=cache_name(DATASET))
+    market = MarketArrays.from_frame(df)
+    starts = make_windows(len(market), args.windows, args.window_length)
+    chunk = args.windows_per_task or len(starts)
+    tasks = [(checkpoint, starts[i:i + chunk]) for checkpoint in checkpoints for i in range(0, len(starts), chunk)]
+    print(f"🚀 {len(checkpoints)} checkpoints × {len(starts)} windows of {args.window_length} bars, {len(tasks)} tasks")
+
+    started = time.perf_counter()
+    with shared_market_arrays(market) as market_dir, ProcessPoolExecutor(args.workers) as pool:
+        task = partial(evaluate_task, market_dir, length=args.window_length)
+        rows = [row for result in pool.map(task, *zip(*tasks)) for row in result]
+    print(f"✅ Evaluated in {time.perf_counter() - started:.1f}s\n")
+
+    table, failed = summarize(rows)
+    print(table.to_string(float_format=lambda x: f"{x:,.3f}"))
+    for checkpoint, error in failed.items():
+        print(f"⚠️ {checkpoint}: {error}")
+    if args.csv:
+        pd.DataFrame(rows).to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
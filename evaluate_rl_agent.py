@@ -1,9 +1,10 @@
-import gymnasium as gym
-import numpy as np
 import os
 import pandas as pd
-from stable_baselines3 import PPO
 from stable_baselines3.common.evaluation import evaluate_policy
+from data_store import read_candles
+from features import add_features, cache_name
+from policy_export import load_policy
+from train_rl_agent import split_index
 from trading_env import TradingEnv  # Ensure it imports the latest env
 
 # Define the model to evaluate
@@ -13,25 +14,31 @@ if not os.path.exists(MODEL_PATH):
     print(f"❌ Model not found: {MODEL_PATH}\nEnsure training has completed and checkpoint exists.")
     exit()
 
-# Load dataset for evaluation
-df = pd.read_csv("data/evaluation_data.csv")
-env = gym.make("TradingEnv-v0", df=df)
-env = gym.wrappers.RecordEpisodeStatistics(env, deque_size=1)
+DATASET = ("kraken", "BTC/USD", "5m")  # (exchange, pair, timeframe) in the data store
+
+# Load dataset for evaluation: features come from the shared cache over the full history,
+# so the hold-out window starts with warmed-up indicators. train_rl_agent.py stops at the same split_index.
+df = add_features(read_candles(*DATASET), name=cache_name(DATASET))
+df = df.iloc[split_index(len(df)):].reset_index(drop=True)
+env = TradingEnv(df, timeframe=DATASET[2])  # Records mark-to-market equity per bar
 
 # Load model
-model = PPO.load(MODEL_PATH, env=env)
+model = load_policy(MODEL_PATH)  # Exported NumPy policy if present, else PPO.load
+
+# Collect the env's end-of-episode risk metrics (computed from its per-bar equity curve)
+episode_metrics = []
+
+def collect_metrics(locals_, globals_):
+    if locals_["done"] and "metrics" in locals_["info"]:
+        episode_metrics.append(locals_["info"]["metrics"])
 
 # Evaluate model performance
-mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=10, render=False)
+mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=10, render=False, callback=collect_metrics)
 print(f"✅ Evaluation Complete:\nMean Reward: {mean_reward}, Std Reward: {std_reward}")
 
-# Additional performance metrics
-def calculate_sharpe_ratio(returns):
-    if len(returns) < 2 or np.std(returns) == 0:
-        return 0
-    return np.mean(returns) / np.std(returns) * np.sqrt(252)
-
-# Extract rewards from episode history
-returns = env.get_episode_rewards()
-sharpe_ratio = calculate_sharpe_ratio(returns)
-print(f"📊 Sharpe Ratio: {sharpe_ratio}")
+# Sharpe/Sortino are annualized from per-bar returns at the dataset's bar frequency
+report = pd.DataFrame(episode_metrics)
+print("📊 Risk metrics per episode:")
+print(report.to_string(float_format=lambda x: f"{x:,.4f}"))
+print(f"📊 Sharpe Ratio: {report['sharpe'].mean():.4f} | Sortino: {report['sortino'].mean():.4f} | "
+      f"Max Drawdown: {report['max_drawdown'].max():.2%} | Exposure: {report['exposure'].mean():.2%}")
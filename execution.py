@@ -0,0 +1,101 @@
+import numpy as np
+
+# BloFin USDT-perpetual base tier; override per venue
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0006
+SLIPPAGE_BPS = 1.0  # Fixed adverse slippage on market orders, in basis points
+
+# Why a position was closed, as stored in exit-reason arrays
+EXIT_NONE, EXIT_STOP, EXIT_TARGET, EXIT_SIGNAL, EXIT_END = range(5)
+EXIT_REASONS = np.array(["", "STOP", "TARGET", "SIGNAL", "END"])
+
+
+class ExecutionModel:
+    """
+    Fill simulation shared by TradingEnv and backtesting: market orders pay the taker fee and slip
+    against the trader, take-profits rest as limit orders (maker fee, no slippage) and stop-losses
+    trigger as market orders. Every method works elementwise on scalars or arrays, so the same code
+    fills one env step or every trade of a backtest at once. `side` is 1 for long, -1 for short.
+    """
+
+    def __init__(self, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE, slippage_bps=SLIPPAGE_BPS, range_slippage=0.0):
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.slippage_bps = slippage_bps
+        self.range_slippage = range_slippage  # Extra slippage as a fraction of the bar's high-low range
+
+    def market_fill(self, price, side, high=None, low=None):
+        """Price a market order actually gets: worse than `price` by the fixed and range-based slippage."""
+        slip = price * self.slippage_bps / 10_000
+        if self.range_slippage and high is not None:
+            slip = slip + self.range_slippage * (high - low)
+        return price + side * slip
+
+    def open_bracket(self, price, side, risk, stop_pct, r_factor, max_notional=np.inf, high=None, low=None):
+        """
+        Market entry with a stop `stop_pct` away from the fill and a take-profit r_factor times further
+        on the other side. Quantity loses `risk` at the stop, capped at max_notional.
+        Returns (entry, quantity, stop, target, entry_fee).
+        """
+        entry = self.market_fill(price, side, high, low)
+        stop = entry * (1 - side * stop_pct)
+        target = entry * (1 + side * stop_pct * r_factor)
+        quantity = np.minimum(risk / (entry * stop_pct), max_notional / entry)
+        return entry, quantity, stop, target, quantity * entry * self.taker_fee
+
+    def bracket_exit(self, open_, high, low, stop, target, side):
+        """
+        Whether one bar's range touches the stop or target, and at what price.
+        A bar that gaps through a level fills at its open. When both are touched the stop is assumed
+        to come first, since the order inside a bar is unknown. NaN levels never trigger.
+        Returns (exit_price, reason) with reason EXIT_NONE where neither level was reached.
+        """
+        adverse = np.where(side > 0, low, high)
+        favorable = np.where(side > 0, high, low)
+        stop_hit = side * (adverse - stop) <= 0
+        target_hit = side * (favorable - target) >= 0
+
+        stop_fill = self.market_fill(np.where(side * (open_ - stop) < 0, open_, stop), -side)
+        target_fill = np.where(side * (open_ - target) > 0, open_, target)
+        reason = np.where(stop_hit, EXIT_STOP, np.where(target_hit, EXIT_TARGET, EXIT_NONE))
+        return np.where(stop_hit, stop_fill, np.where(target_hit, target_fill, np.nan)), reason
+
+    def exit_fee_rate(self, reason):
+        """Take-profits are resting limit orders; every other exit crosses the spread."""
+        return np.where(reason == EXIT_TARGET, self.maker_fee, self.taker_fee)
+
+    def simulate_trades(self, open_, high, low, close, entry_bars, exit_bars, stop, target, side=1):
+        """
+        Resolve many trades at once. Trade k is opened at the close of entry_bars[k]; the stop and target
+        are checked against bars entry_bars[k] + 1 .. exit_bars[k], and a trade neither level closes
+        exits at the close of exit_bars[k] (EXIT_SIGNAL, or EXIT_END on the last bar).
+        All bars of all trades are laid out in one flat array, so the cost is one pass over the held bars.
+        Returns a dict of per-trade arrays: exit_bar, exit_price (before fees) and reason.
+        """
+        entry_bars = np.asarray(entry_bars, dtype=np.int64)
+        exit_bars = np.asarray(exit_bars, dtype=np.int64)
+        n = len(entry_bars)
+        stop = np.broadcast_to(np.asarray(stop, dtype=np.float64), (n,))
+        target = np.broadcast_to(np.asarray(target, dtype=np.float64), (n,))
+        side = np.broadcast_to(np.asarray(side), (n,))
+
+        lengths = exit_bars - entry_bars
+        held = np.flatnonzero(lengths > 0)
+        starts = np.cumsum(lengths[held]) - lengths[held]
+        total = int(lengths[held].sum())
+        trade = np.repeat(held, lengths[held])
+        bar = entry_bars[trade] + 1 + np.arange(total) - np.repeat(starts, lengths[held])
+
+        price, reason = self.bracket_exit(open_[bar], high[bar], low[bar], stop[trade], target[trade], side[trade])
+        first = np.full(n, total, dtype=np.int64)
+        if total:
+            first[held] = np.minimum.reduceat(np.where(reason != EXIT_NONE, np.arange(total), total), starts)
+
+        touched = first < total
+        exit_bar = exit_bars.copy()
+        exit_price = self.market_fill(close[exit_bars], -side)
+        exit_reason = np.where(exit_bars == len(close) - 1, EXIT_END, EXIT_SIGNAL)
+        exit_bar[touched] = bar[first[touched]]
+        exit_price[touched] = price[first[touched]]
+        exit_reason[touched] = reason[first[touched]]
+        return {"exit_bar": exit_bar, "exit_price": exit_price, "reason": exit_reason}
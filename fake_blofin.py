@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import random
+
+import websockets
+from aiohttp import web
+
+CANDLES_PATH = "/api/v1/market/candles"
+
+
+class FakeBlofin:
+    """
+    Offline stand-in for BloFin's public candle feed, for exercising ws_ingest without the exchange.
+    Bars advance every `bar_seconds` of real time (timestamps still step by `timeframe_ms`), each bar is
+    pushed `updates_per_bar` times with confirm "0" and once with confirm "1". Every `drop_every` bars all
+    sockets are closed and the next `outage_bars` bars are never pushed, so clients must backfill them
+    from the REST endpoint, which serves the full history.
+    """
+
+    def __init__(self, symbols, bar_seconds=1.0, updates_per_bar=3, drop_every=0, outage_bars=2,
+                 timeframe_ms=300_000, start_ts=1_700_000_000_000, seed=0):
+        self.symbols = list(symbols)
+        self.bar_seconds = bar_seconds
+        self.updates_per_bar = updates_per_bar
+        self.drop_every = drop_every
+        self.outage_bars = outage_bars
+        self.timeframe_ms = timeframe_ms
+        self.rng = random.Random(seed)
+        self.history = {symbol: [] for symbol in self.symbols}  # Rows oldest-first; the last may be forming
+        self.prices = {symbol: 100.0 * (i + 1) for i, symbol in enumerate(self.symbols)}
+        self.next_ts = start_ts
+        self.bars = 0
+        self.muted_until = 0  # Bars numbered below this are generated but not pushed
+        self.clients = {}  # websocket -> subscribed instIds
+        self.connections = 0
+
+    def _new_bar(self, symbol):
+        price = self.prices[symbol]
+        return [str(self.next_ts), price, price, price, price, 0.0, "0", "0", "0"]
+
+    def _tick(self, row, symbol, confirm):
+        price = self.prices[symbol] * (1 + self.rng.gauss(0, 0.001))
+        self.prices[symbol] = price
+        row[2], row[3], row[4] = max(row[2], price), min(row[3], price), price
+        row[5] += self.rng.random()
+        row[8] = "1" if confirm else "0"
+        return [str(value) for value in row]
+
+    async def _push(self, symbol, row):
+        message = json.dumps({"arg": {"channel": "candle5m", "instId": symbol}, "data": [row]})
+        for ws, subscribed in list(self.clients.items()):
+            if symbol in subscribed:
+                try:
+                    await ws.send(message)
+                except websockets.ConnectionClosed:
+                    pass
+
+    async def produce(self, n_bars=None):
+        """Generate bars forever (or n_bars), pushing updates to subscribed clients."""
+        while n_bars is None or self.bars < n_bars:
+            rows = {symbol: self._new_bar(symbol) for symbol in self.symbols}
+            for symbol in self.symbols:
+                self.history[symbol].append(rows[symbol])
+            muted = self.bars < self.muted_until
+            for update in range(self.updates_per_bar + 1):
+                await asyncio.sleep(self.bar_seconds / (self.updates_per_bar + 1))
+                for symbol in self.symbols:
+                    pushed = self._tick(rows[symbol], symbol, confirm=update == self.updates_per_bar)
+                    if not muted:
+                        await self._push(symbol, pushed)
+            self.next_ts += self.timeframe_ms
+            self.bars += 1
+            if self.drop_every and self.bars % self.drop_every == 0:
+                self.muted_until = self.bars + self.outage_bars
+                for ws in list(self.clients):
+                    await ws.close()
+
+    async def ws_handler(self, ws, path=None):
+        self.connections += 1
+        self.clients[ws] = set()
+        try:
+            async for message in ws:
+                if message == "ping":
+                    await ws.send("pong")
+                    continue
+                request = json.loads(message)
+                if request.get("op") == "subscribe":
+                    self.clients[ws].update(arg["instId"] for arg in request["args"])
+                    await ws.send(json.dumps({"event": "subscribe", "args": request["args"]}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.pop(ws, None)
+
+    async def candles_handler(self, request):
+        symbol = request.query.get("instId")
+        limit = int(request.query.get("limit", 100))
+        if symbol not in self.history:
+            return web.json_response({"code": "51001", "msg": "Instrument ID does not exist", "data": []})
+        rows = [[str(value) for value in row] for row in self.history[symbol][-limit:]]
+        return web.json_response({"code": "0", "msg": "success", "data": rows[::-1]})  # Newest first, like BloFin
+
+    async def serve(self, host="127.0.0.1", ws_port=8765, http_port=8766, n_bars=None):
+        app = web.Application()
+        app.router.add_get(CANDLES_PATH, self.candles_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, http_port).start()
+        try:
+            async with websockets.serve(self.ws_handler, host, ws_port):
+                print(f"Fake BloFin: ws://{host}:{ws_port}, REST http://{host}:{http_port}{CANDLES_PATH}")
+                await self.produce(n_bars)
+        finally:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake BloFin candle feed for offline testing of the stream mode.")
+    parser.add_argument("--symbols", nargs="+", default=["BTC-USDT", "ETH-USDT", "SOL-USDT"])
+    parser.add_argument("--bar-seconds", type=float, default=1.0)
+    parser.add_argument("--drop-every", type=int, default=10, help="Close every socket after this many bars (0 = never)")
+    parser.add_argument("--outage-bars", type=int, default=2, help="Bars withheld from the push feed after a drop")
+    parser.add_argument("--ws-port", type=int, default=8765)
+    parser.add_argument("--http-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = FakeBlofin(args.symbols, args.bar_seconds, drop_every=args.drop_every, outage_bars=args.outage_bars)
+    print(f"Point the bot at it with BLOFIN_WS_URL=ws://127.0.0.1:{args.ws_port} BLOFIN_BASE_URL=http://127.0.0.1:{args.http_port}")
+    asyncio.run(server.serve(ws_port=args.ws_port, http_port=args.http_port))
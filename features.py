@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+FEATURE_CACHE_DIR = os.path.join("data", "features")
+WARMUP_FACTOR = 30  # Extra lookbacks of history re-fed to recursive indicators (EMA/RSI/ATR) when extending
+
+# Declared indicator set. OHLCV plus these six columns gives TradingEnv's 11-feature observation.
+FEATURE_SPEC = [
+    {"name": "trend_sma_fast", "function": "SMA", "inputs": ["close"], "params": {"timeperiod": 10}},
+    {"name": "trend_sma_slow", "function": "SMA", "inputs": ["close"], "params": {"timeperiod": 20}},
+    {"name": "trend_ema", "function": "EMA", "inputs": ["close"], "params": {"timeperiod": 20}},
+    {"name": "momentum_rsi", "function": "RSI", "inputs": ["close"], "params": {"timeperiod": 14}},
+    {"name": "volatility_atr", "function": "ATR", "inputs": ["high", "low", "close"], "params": {"timeperiod": 14}},
+    {"name": "volatility_std", "function": "STDDEV", "inputs": ["close"], "params": {"timeperiod": 20}},
+]
+
+
+def cache_name(dataset):
+    """Cache file prefix for an (exchange, pair, timeframe) data-store key."""
+    return "_".join(part.replace("/", "-") for part in dataset)
+
+
+def spec_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def spec_inputs(spec):
+    """Input columns the spec reads, in a stable order."""
+    return sorted({column for feature in spec for column in feature["inputs"]})
+
+
+def spec_lookback(spec):
+    """Leading rows for which at least one indicator in the spec is still NaN."""
+    from talib import abstract  # Imported lazily so the live bot can use FEATURE_SPEC without TA-Lib
+
+    return max(abstract.Function(f["function"], **f["params"]).lookback for f in spec)
+
+
+def warmup_bars(spec):
+    """Bars of history needed before new rows so extended values match a full recomputation."""
+    return WARMUP_FACTOR * (spec_lookback(spec) + 1)
+
+
+def compute_features(df, spec=FEATURE_SPEC):
+    """Compute every indicator in the spec with TA-Lib over whole columns; NaN during each warm-up."""
+    import talib
+
+    inputs = {column: df[column].to_numpy(dtype=np.float64) for column in spec_inputs(spec)}
+    features = {
+        f["name"]: getattr(talib, f["function"])(*(inputs[c] for c in f["inputs"]), **f["params"])
+        for f in spec
+    }
+    return pd.DataFrame(features, index=df.index)
+
+
+def _input_matrix(df, spec):
+    """Row-major input matrix, so the hash of the first n rows is a prefix of the full hash."""
+    return np.ascontiguousarray(df[spec_inputs(spec)].to_numpy(dtype=np.float64))
+
+
+def _save_cache(path, features, rows, data_hash):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, rows=rows, data_hash=data_hash, **{name: features[name].to_numpy() for name in features})
+    os.replace(tmp_path, path)
+
+
+def cached_features(df, name, spec=FEATURE_SPEC, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Feature frame for df, reusing the on-disk cache for (name, spec).
+    The cache is valid when the hash of the input columns matches; if df only appends rows
+    to the cached data, just the new tail (plus a warm-up window) is computed.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{name}_{spec_hash(spec)}.npz")
+    matrix = _input_matrix(df, spec)
+    hasher = hashlib.sha1()
+
+    if os.path.exists(path):
+        with np.load(path) as cache:
+            cached_rows = int(cache["rows"])
+            if cached_rows <= len(df):
+                hasher.update(matrix[:cached_rows].tobytes())
+                if hasher.hexdigest() == str(cache["data_hash"]):
+                    cached = pd.DataFrame({f["name"]: cache[f["name"]] for f in spec})
+                    if cached_rows == len(df):
+                        return cached.set_index(df.index)
+                    start = max(0, cached_rows - warmup_bars(spec))
+                    tail = compute_features(df.iloc[start:], spec).iloc[cached_rows - start:]
+                    features = pd.concat([cached, tail.reset_index(drop=True)], ignore_index=True)
+                    hasher.update(matrix[cached_rows:].tobytes())
+                    _save_cache(path, features, len(df), hasher.hexdigest())
+                    print(f"✅ Extended feature cache {path} by {len(df) - cached_rows} rows")
+                    return features.set_index(df.index)
+        hasher = hashlib.sha1()
+
+    features = compute_features(df, spec)
+    hasher.update(matrix.tobytes())
+    _save_cache(path, features.reset_index(drop=True), len(df), hasher.hexdigest())
+    print(f"✅ Computed {len(spec)} features for {len(df)} rows, cached at {path}")
+    return features
+
+
+@timed("add_features_seconds")
+def add_features(df, name=None, spec=FEATURE_SPEC, dropna=True):
+    """
+    Append the spec's indicator columns to a candle frame (cached on disk when name is given).
+    dropna removes the leading warm-up rows so every observation is finite.
+    """
+    features = cached_features(df, name, spec) if name is not None else compute_features(df, spec)
+    df = pd.concat([df, features], axis=1)
+    if dropna:
+        df = df.dropna(subset=list(features.columns)).reset_index(drop=True)
+    return df
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import json
+import queue
+import socketserver
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 2.0  # How long the first request of a batch waits for company before the forward pass
+LATENCY_WINDOW = 10_000  # Recent requests kept for the latency percentiles
+
+
+class PolicyServer:
+    """
+    Loads a policy once and answers predict requests from many symbols/clients with micro-batched
+    forward passes: the worker takes the first queued observation, keeps collecting until
+    max_batch_size is reached or max_wait_ms has passed, then runs a single model.predict on the stack.
+    `model` is a checkpoint path (loaded with PPO.load) or any object with SB3's predict signature.
+    Observations must match the policy's observation shape; a request whose future was cancelled
+    (e.g. a timed-out predict_async) is dropped before its batch runs.
+    """
+
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, deterministic=True):
+        if isinstance(model, str):
+            from stable_baselines3 import PPO
+            model = PPO.load(model, device="cpu")
+        self.model = model
+        # SB3 models declare an observation_space; NumpyPolicy an obs_shape
+        space = getattr(model, "observation_space", None)
+        self.obs_shape = tuple(space.shape) if space is not None else tuple(getattr(model, "obs_shape", ())) or None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.deterministic = deterministic
+        self.requests = queue.Queue()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = Counter()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._run, name="policy-server", daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+        if self.worker is not None:
+            self.worker.join()
+        # Requests still queued behind the stop marker would otherwise never resolve
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("❌ ERROR: Policy server stopped before answering"))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, obs):
+        """Queue one observation; the returned Future resolves to its action."""
+        obs = np.asarray(obs, dtype=np.float32)
+        if self.obs_shape is not None and obs.shape != self.obs_shape:
+            raise ValueError(f"❌ ERROR: Observation has shape {obs.shape}, the policy expects {self.obs_shape}")
+        if not self.running:
+            raise RuntimeError("❌ ERROR: Policy server is not running")
+        future = Future()
+        self.requests.put((obs, future, time.perf_counter()))
+        return future
+
+    def predict(self, obs, timeout=None):
+        return self.submit(obs).result(timeout)
+
+    async def predict_async(self, obs):
+        return await asyncio.wrap_future(self.submit(obs))
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self.running:
+            first = self.requests.get()
+            if first is None:
+                break
+            # Cancelled futures cannot take a result; marking the rest running stops later cancels
+            batch = [item for item in self._collect(first) if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                actions, _ = self.model.predict(np.stack([obs for obs, _, _ in batch]), deterministic=self.deterministic)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            with self.lock:
+                self.batch_sizes[len(batch)] += 1
+                self.latencies.extend(done - queued for _, _, queued in batch)
+            for (_, future, _), action in zip(batch, actions):
+                future.set_result(action.item() if np.ndim(action) == 0 else action.tolist())
+
+    def stats(self):
+        """Latency percentiles (ms, over the recent window) and the batch-size histogram."""
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            histogram = dict(sorted(self.batch_sizes.items()))
+        batches = sum(histogram.values())
+        requests = sum(size * count for size, count in histogram.items())
+        stats = {"requests": requests, "batches": batches, "mean_batch_size": requests / batches if batches else 0.0,
+                 "batch_size_histogram": histogram}
+        if len(latencies):
+            stats.update({f"latency_p{p}_ms": float(np.percentile(latencies, p)) for p in (50, 90, 99)})
+        return stats
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Line-delimited JSON: {"obs": [...]} -> {"action": a}, {"stats": true} -> PolicyServer.stats()."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("stats"):
+                    response = self.server.policy.stats()
+                else:
+                    response = {"action": self.server.policy.predict(request["obs"])}
+            except Exception as e:
+                response = {"error": repr(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve_socket(policy, host="127.0.0.1", port=5555):
+    """Expose a started PolicyServer on a local TCP socket; one thread per client, all sharing the batcher."""
+    server = _TCPServer((host, port), _RequestHandler)
+    server.policy = policy
+    return server
+
+
+class PolicyClient:
+    """Blocking client for serve_socket; keep one per symbol/worker so their requests batch together."""
+
+    def __init__(self, host="127.0.0.1", port=5555):
+        import socket
+        self.sock = socket.create_connection((host, port))
+        self.reader = self.sock.makefile("rb")
+
+    def _call(self, request):
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+        response = json.loads(self.reader.readline())
+        if "error" in response:
+            raise RuntimeError(f"❌ ERROR: Policy server failed: {response['error']}")
+        return response
+
+    def predict(self, obs):
+        return self._call({"obs": np.asarray(obs, dtype=np.float32).tolist()})["action"]
+
+    def stats(self):
+        return self._call({"stats": True})
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve micro-batched policy decisions over a local socket.")
+    parser.add_argument("--model", default="optimized_trading_agent.zip")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--stats-interval", type=float, default=60, help="Seconds between printed stats (0 = off)")
+    args = parser.parse_args()
+
+    policy = PolicyServer(args.model, args.max_batch_size, args.max_wait_ms).start()
+    server = serve_socket(policy, args.host, args.port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"✅ Serving {args.model} on {args.host}:{args.port} (batch ≤ {args.max_batch_size}, wait ≤ {args.max_wait_ms} ms)")
+    try:
+        while True:
+            time.sleep(args.stats_interval or 3600)
+            if args.stats_interval:
+                print(f"📊 {json.dumps(policy.stats())}")
+    except KeyboardInterrupt:
+        server.shutdown()
+        policy.stop()
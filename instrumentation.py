@@ -0,0 +1,325 @@
+import atexit
+import bisect
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Opt-in: with SWARM_METRICS unset, timed() returns functions unwrapped and timer() is a shared no-op,
+# so instrumented hot paths cost nothing. Set the variables before the process starts.
+ENABLED = os.getenv("SWARM_METRICS", "") not in ("", "0")
+METRICS_PORT = os.getenv("SWARM_METRICS_PORT")  # Serve Prometheus text at http://host:PORT/metrics
+METRICS_HOST = os.getenv("SWARM_METRICS_HOST", "127.0.0.1")  # Loopback only; set 0.0.0.0 to expose it to scrapers
+METRICS_JSON = os.getenv("SWARM_METRICS_JSON")  # Write a JSON snapshot here every SWARM_METRICS_INTERVAL seconds
+METRICS_INTERVAL = float(os.getenv("SWARM_METRICS_INTERVAL", "60"))
+PROFILE_HZ = float(os.getenv("SWARM_PROFILE_HZ", "0"))  # > 0 starts the sampling profiler at this rate
+PROFILE_PATH = os.getenv("SWARM_PROFILE_PATH", "profile.folded")
+EXPORTER_THREADS = "metrics-"  # Name prefix of the threads started here
+
+# Seconds; spans a microsecond env step up to a slow exchange round trip
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """Monotonic count, e.g. calls or errors."""
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def snapshot(self):
+        return {"count": self.value}
+
+    def prometheus(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Histogram:
+    """Fixed-bucket distribution of observations (latencies in seconds) with count, sum and max."""
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the max for the +Inf bucket)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count if self.count else 0.0,
+                "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99), "max": self.max}
+
+    def prometheus(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class Registry:
+    """Process-wide metrics by name; metrics are created on first use."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.setdefault(name, cls(name, help))
+        return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help=""):
+        return self._get(Histogram, name, help)
+
+    def snapshot(self):
+        return {"pid": os.getpid(), "time": time.time(),
+                "metrics": {name: metric.snapshot() for name, metric in sorted(self.metrics.items())}}
+
+    def prometheus(self):
+        return "\n".join(line for _, metric in sorted(self.metrics.items()) for line in metric.prometheus()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def timed(name, help=""):
+    """
+    Decorator recording each call's duration in histogram `name` and exceptions in a matching
+    `*_errors_total` counter (fetch_seconds -> fetch_errors_total).
+    Works on plain and async functions; returns the function untouched when metrics are disabled.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+        histogram = REGISTRY.histogram(name, help or f"Duration of {function.__qualname__} in seconds")
+        errors = REGISTRY.counter(f"{name.removesuffix('_seconds')}_errors_total", f"Exceptions raised by {function.__qualname__}")
+
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                except BaseException:
+                    errors.inc()
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+_NULL_TIMER = nullcontext()
+
+
+@contextmanager
+def _timer(histogram):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def timer(name, help=""):
+    """Context manager timing a block into histogram `name`; a shared no-op when metrics are disabled."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _timer(REGISTRY.histogram(name, help))
+
+
+def count(name, n=1, help=""):
+    """Add n to counter `name` (no-op when disabled)."""
+    if ENABLED:
+        REGISTRY.counter(name, help).inc(n)
+
+
+def instrument_predict(policy, name="policy_predict_seconds"):
+    """Time policy.predict on this instance (SB3 model or NumpyPolicy); returns the policy."""
+    if ENABLED:
+        policy.predict = timed(name, "Duration of model.predict in seconds")(policy.predict)
+    return policy
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+def serve_prometheus(port, host=METRICS_HOST):
+    """
+    Serve the registry in Prometheus text format from a daemon thread; returns the server.
+    Binds to loopback unless another host is given, since the endpoint has no authentication.
+    """
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_json(path):
+    """Atomically replace `path` with a snapshot of the registry."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(REGISTRY.snapshot(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for production: a daemon thread samples every other thread's Python stack
+    `hz` times a second via sys._current_frames() and tallies them as folded stacks
+    ("module:function;module:function count" lines, the input of flamegraph.pl and speedscope).
+    Costs one stack walk per thread per sample and never touches the profiled threads; the
+    instrumentation's own exporter threads are left out.
+    """
+
+    def __init__(self, hz=100.0, path=PROFILE_PATH, max_depth=64):
+        self.interval = 1.0 / hz
+        self.path = path
+        self.max_depth = max_depth
+        self.stacks = Tally()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            skip = {thread.ident for thread in threading.enumerate() if thread.name.startswith(EXPORTER_THREADS)}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in skip:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def dump(self, path=None):
+        """Write the folded stacks collected so far; returns the path."""
+        path = path or self.path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        os.replace(tmp_path, path)
+        return path
+
+
+def _report_periodically(path, interval, profiler):
+    while True:
+        time.sleep(interval)
+        try:
+            if path:
+                write_json(path)
+            if profiler is not None:
+                profiler.dump()
+        except OSError as e:
+            logging.warning(f"Metrics export failed: {e}")
+
+
+def start(port=METRICS_PORT, json_path=METRICS_JSON, interval=METRICS_INTERVAL, profile_hz=PROFILE_HZ, host=METRICS_HOST):
+    """
+    Start the configured exporters: Prometheus endpoint, periodic JSON snapshot and sampling profiler.
+    Called on import when SWARM_METRICS is set, in the main process only, so SubprocVecEnv and pool
+    workers do not fight over the port and files. Returns the profiler, if any.
+    """
+    if port:
+        try:
+            serve_prometheus(port, host)
+            print(f"📈 Metrics at http://{host}:{port}/metrics")
+        except OSError as e:
+            logging.warning(f"Metrics endpoint not started on port {port}: {e}")
+    profiler = SamplingProfiler(profile_hz).start() if profile_hz > 0 else None
+    if json_path or profiler is not None:
+        threading.Thread(target=_report_periodically, args=(json_path, interval, profiler),
+                         name="metrics-report", daemon=True).start()
+        atexit.register(lambda: (json_path and write_json(json_path), profiler and profiler.dump()))
+    return profiler
+
+
+PROFILER = start() if ENABLED and multiprocessing.parent_process() is None else None
@@ -1,85 +1,63 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
 import time
-from stable_baselines3 import PPO
+from data_store import read_candles
+from features import add_features, cache_name
+from live_session import MAX_CHART_POINTS, ChartFeed, TradingSession
+from policy_export import load_policy
 from trading_env import TradingEnv
 
-# Load model & data
-df = pd.read_csv("data/BTC-USD.csv")
-env = TradingEnv(df)
-model = PPO.load("ppo_trading_agent")
+DATASET = ("kraken", "BTC/USD", "5m")
+STEP_DELAY = 0.5  # Seconds between simulated steps
+REFRESH_SECONDS = 0.5  # Page update interval, independent of the simulation pace
+TRADE_PAGE_SIZE = 50
 
-# Initialize session state
-if "portfolio_values" not in st.session_state:
-    st.session_state["portfolio_values"] = []
-if "trade_history" not in st.session_state:
-    st.session_state["trade_history"] = []
-if "current_step" not in st.session_state:
-    st.session_state["current_step"] = 0
+
+@st.cache_resource
+def get_session():
+    """One simulation per server process; Streamlit reruns reattach to it instead of restarting it."""
+    df = add_features(read_candles(*DATASET), name=cache_name(DATASET))
+    env = TradingEnv(df)
+    model = load_policy("ppo_trading_agent")  # Torch-free when an exported .npz exists (policy_export.py)
+    return TradingSession(env, model, step_delay=STEP_DELAY).start()
+
+
+session = get_session()
 
 # Streamlit layout
 st.title("📈 RL Trading Agent Live Dashboard")
 
 portfolio_chart = st.empty()
-trade_log = st.empty()
 reward_chart = st.empty()
+st.write("📊 **Trade History** (newest first)")
+page = st.number_input("Page", min_value=1, value=1, step=1) - 1
+trade_log = st.empty()
 
-obs, _ = env.reset()
-obs = np.array(obs, dtype=np.float32)
-
-expected_shape = env.observation_space.shape[0]
-
-# ✅ Ensure obs has the exact expected shape (11,)
-obs = obs[:expected_shape]  # Trim excess if needed
-obs = obs.squeeze()  # ✅ Remove batch dimension if present
-
-done = False
-while not done:
-    print(f"Obs Before Predict: {obs.shape}, Expected: {env.observation_space.shape}")  # Debugging
-
-    action, _ = model.predict(obs)  # ✅ Pass correct shape
-
-    obs, reward, done, _, _ = env.step(action)
-    obs = np.array(obs, dtype=np.float32)
-
-    # ✅ Maintain correct shape for next step
-    obs = obs[:expected_shape]  # Trim excess if needed
-    obs = obs.squeeze()  # ✅ Remove batch dimension
-
-# Update live portfolio value
-    current_value = env.balance + (env.position * df.loc[env.current_step, "close"])
-    st.session_state["portfolio_values"].append(current_value)
-
-    # Track trade history
-    if action == 1:
-        st.session_state["trade_history"].append({"Step": st.session_state["current_step"], "Action": "BUY"})
-    elif action == 0 and env.position > 0:
-        st.session_state["trade_history"].append({"Step": st.session_state["current_step"], "Action": "SELL"})
-
-    # Update dashboard
-    with portfolio_chart.container():
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(y=st.session_state["portfolio_values"], mode="lines", name="Portfolio Value"))
-        fig.update_layout(title="Portfolio Value Over Time", xaxis_title="Time Step", yaxis_title="Value (USD)")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with trade_log.container():
-        trade_df = pd.DataFrame(st.session_state["trade_history"])
-        st.write("📊 **Trade History**")
-        st.dataframe(trade_df)
+# Each tick sends only the points appended since the last one. Once the chart holds MAX_CHART_POINTS
+# it is replaced by a decimated overview of half that, so rebuilds stay rare and the page stays small.
+feed = ChartFeed(session, MAX_CHART_POINTS)
+chart = None
+trades_shown = -1
+while True:
+    finished = session.done  # Read before draining so the last points are always drawn
+    rebuild, steps, values = feed.poll()
+    if rebuild:
+        chart = portfolio_chart.line_chart(pd.DataFrame({"Portfolio Value": values}, index=steps))
+    elif len(steps):
+        chart.add_rows(pd.DataFrame({"Portfolio Value": values}, index=steps))
 
     with reward_chart.container():
-        st.write("💰 **Recent Reward:**", round(reward, 2))
-
-    # Add delay to simulate real-time updates
-    time.sleep(0.5)
-
-st.success("✅ Trading session complete!")
-
+        st.write("💰 **Recent Reward:**", round(session.last_reward, 2), f"| Steps: {feed.cursor - 1:,}")
 
+    if session.trade_total != trades_shown:
+        trades_shown = session.trade_total
+        trade_log.dataframe(pd.DataFrame(session.trade_page(page, TRADE_PAGE_SIZE)), use_container_width=True)
 
- 
+    if finished:
+        break
+    time.sleep(REFRESH_SECONDS)
 
-   
\ No newline at end of file
+if session.error is not None:
+    st.error(f"❌ Trading session stopped: {session.error!r}")
+else:
+    st.success("✅ Trading session complete!")
@@ -0,0 +1,153 @@
+import threading
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+from downsampling import minmax_lttb_indices
+
+HISTORY_CAPACITY = 500_000  # Portfolio points kept; about 4.7 years of 5m bars
+TRADE_CAPACITY = 10_000  # Most recent trades kept for the trade table
+MAX_CHART_POINTS = 2_000  # A streamed chart is rebuilt to half this from a decimated history when it fills up
+
+
+class RingBuffer:
+    """
+    Fixed-capacity float64 rows; once full the oldest rows are overwritten.
+    `total` counts every row ever appended, so readers can ask for what arrived after a cursor.
+    """
+
+    def __init__(self, capacity, n_columns):
+        self.data = np.empty((capacity, n_columns), dtype=np.float64)
+        self.capacity = capacity
+        self.total = 0
+
+    def append(self, row):
+        self.data[self.total % self.capacity] = row
+        self.total += 1
+
+    def since(self, cursor):
+        """Rows appended after `cursor` (those still held), oldest first, plus the new cursor."""
+        first = max(cursor, self.total - self.capacity)
+        index = np.arange(first, self.total) % self.capacity
+        return self.data[index], self.total
+
+    def values(self):
+        return self.since(0)[0]
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+
+class TradingSession:
+    """
+    Runs the policy on a TradingEnv in a background thread, independent of any UI refresh.
+    Portfolio values go into a bounded ring buffer and trades into a bounded deque, so a
+    day-long session holds the same memory as the first minute. Readers poll for new points
+    or a decimated view of the whole history.
+    """
+
+    def __init__(self, env, model, step_delay=0.5, capacity=HISTORY_CAPACITY, trade_capacity=TRADE_CAPACITY):
+        self.env = env
+        self.model = model
+        self.step_delay = step_delay  # Pace of the simulated feed; 0 runs flat out
+        self.history = RingBuffer(capacity, 2)  # (step, portfolio value)
+        self.trades = deque(maxlen=trade_capacity)
+        self.trade_total = 0
+        self.last_reward = 0.0
+        self.done = False
+        self.error = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trading-session", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _observation(self, obs):
+        # Policies are trained on the env's declared observation width
+        return np.asarray(obs, dtype=np.float32)[:self.env.observation_space.shape[0]]
+
+    def _run(self):
+        try:
+            obs, _ = self.env.reset()
+            with self.lock:
+                self.history.append((0, self.env.portfolio_value))
+            step = 0
+            while not self._stop.is_set():
+                action, _ = self.model.predict(self._observation(obs), deterministic=True)
+                was_open = self.env.position
+                obs, reward, done, _, info = self.env.step(int(action))
+                step += 1
+                with self.lock:
+                    self.history.append((step, info["portfolio_value"]))
+                    self.last_reward = float(reward)
+                    if self.env.position != was_open:
+                        self.trades.append({
+                            "Step": step,
+                            "Action": "BUY" if self.env.position else "SELL",
+                            "Price": float(self.env.market.close[self.env.current_step]),
+                            "Portfolio Value": float(info["portfolio_value"]),
+                        })
+                        self.trade_total += 1
+                if done:
+                    break
+                if self.step_delay:
+                    self._stop.wait(self.step_delay)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def since(self, cursor):
+        """(steps, values, new cursor) for the points appended after `cursor`."""
+        with self.lock:
+            rows, cursor = self.history.since(cursor)
+        return rows[:, 0], rows[:, 1], cursor
+
+    def overview(self, n_points):
+        """(steps, values, cursor) of the whole held history decimated to about n_points with MinMaxLTTB."""
+        with self.lock:
+            rows, cursor = self.history.since(0)
+        index = minmax_lttb_indices(rows[:, 1], n_points, rows[:, 0])
+        return rows[index, 0], rows[index, 1], cursor
+
+    def trade_page(self, page, page_size):
+        """Trades on page `page` (0 = newest), newest first."""
+        with self.lock:
+            return list(islice(reversed(self.trades), page * page_size, (page + 1) * page_size))
+
+
+class ChartFeed:
+    """
+    What to send to an incrementally updated chart of a session's portfolio value. The chart starts as
+    a decimated overview of max_points // 2 points; new points are appended as they arrive until it
+    holds max_points, then it is rebuilt to a fresh half-size overview. A full rebuild therefore
+    happens at most once per max_points // 2 new points, however long the session runs.
+    """
+
+    def __init__(self, session, max_points=MAX_CHART_POINTS):
+        self.session = session
+        self.max_points = max_points
+        self.cursor = 0
+        self.points = None  # Points on the chart; None until the first rebuild
+        self.rebuilds = 0
+
+    def poll(self):
+        """(rebuild, steps, values): replace the chart with these points if rebuild, else append them."""
+        if self.points is None or self.points >= self.max_points:
+            steps, values, self.cursor = self.session.overview(self.max_points // 2)
+            self.points = len(steps)
+            self.rebuilds += 1
+            return True, steps, values
+        steps, values, self.cursor = self.session.since(self.cursor)
+        self.points += len(steps)
+        return False, steps, values
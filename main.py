@@ -1,9 +1,16 @@
+import asyncio
 import os
+import sys
+import aiohttp
 import requests
 import pandas as pd
 import time
 import logging
+from contextlib import nullcontext
 from dotenv import load_dotenv
+from instrumentation import count, timed, timer
+from streaming_indicators import IndicatorSet
+from ws_ingest import CandleStream
 
 BASE_DIR = r"C:\Users\erikn\Desktop\Trading Agents Swarm 3.10\Bot's"
 LOG_DIR = os.path.join(BASE_DIR, "logs")
@@ -13,7 +20,16 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 
 API_KEY = os.getenv("BL0FIN_API_KEY")
 SECRET_KEY = os.getenv("BL0FIN_SECRET_KEY")
-BASE_URL = "https://openapi.blofin.com"
+BASE_URL = os.getenv("BLOFIN_BASE_URL", "https://openapi.blofin.com")  # Override to point at a local stub
+WS_URL = os.getenv("BLOFIN_WS_URL", "wss://openapi.blofin.com/ws/public")
+CANDLES_PATH = "/api/v1/market/candles"
+
+SYMBOLS = ["BTC-USDT", "ETH-USDT", "SOL-USDT"]  # Instruments traded by run_bot_async
+MAX_CONNECTIONS = 32  # Pooled keep-alive connections shared by every symbol
+REQUEST_TIMEOUT = 10  # Seconds; bounds the candle-close-to-decision latency of a slow symbol
+CLOSE_DELAY = 1.0  # Seconds after a candle closes before polling, so the exchange has finalized it
+STOP_LOSS_PCT = 0.01  # Stop distance from the entry for simple_strategy's trades
+R_FACTOR = 2  # Take-profit distance as a multiple of the stop distance
 
 logging.basicConfig(
     filename=os.path.join(LOG_DIR, "trading_bot.log"),
@@ -27,24 +43,117 @@ trade_stats = {
     "winning_trades": 0,
 }
 
+session = requests.Session()  # Reuses TCP/TLS connections between polls
+
+def parse_candles(data):
+    columns = ["timestamp", "open", "high", "low", "close", "volume"]
+    df = pd.DataFrame([d[:6] for d in data], columns=columns)
+    df[columns[1:]] = df[columns[1:]].astype(float)
+    df["timestamp"] = pd.to_datetime(df["timestamp"].astype("int64"), unit="ms")
+    return df.sort_values("timestamp", ignore_index=True)  # API returns newest first
+
+@timed("fetch_market_data_seconds")
 def fetch_market_data(symbol, timeframe="5m", limit=50):
-    endpoint = f"{BASE_URL}/api/v1/market/candles"
+    endpoint = f"{BASE_URL}{CANDLES_PATH}"
     headers = {"X-ACCESS-KEY": API_KEY}
     params = {"instId": symbol, "interval": timeframe, "limit": limit}
 
     try:
-        response = requests.get(endpoint, headers=headers, params=params)
+        response = session.get(endpoint, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
-            data = response.json().get("data", [])
-            columns = ["timestamp", "open", "high", "low", "close", "volume"]
-            df = pd.DataFrame([d[:6] for d in data], columns=columns)
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            return df
+            return parse_candles(response.json().get("data", []))
         logging.error(f"API Error: {response.status_code} - {response.text}")
     except Exception as e:
         logging.error(f"Data fetch error: {e}")
     return None
 
+@timed("fetch_candle_rows_seconds")
+async def fetch_candle_rows_async(http, symbol, timeframe="5m", limit=50):
+    """Raw candle rows [ts, o, h, l, c, vol, ..., confirm] over a shared aiohttp session; None on errors."""
+    params = {"instId": symbol, "interval": timeframe, "limit": str(limit)}
+    try:
+        async with http.get(f"{BASE_URL}{CANDLES_PATH}", params=params) as response:
+            if response.status == 200:
+                payload = await response.json()
+                return payload.get("data", [])
+            logging.error(f"API Error for {symbol}: {response.status} - {await response.text()}")
+    except Exception as e:
+        logging.error(f"Data fetch error for {symbol}: {e!r}")
+    return None
+
+async def fetch_market_data_async(http, symbol, timeframe="5m", limit=50):
+    """Async fetch_market_data over a shared aiohttp session; returns None on errors."""
+    data = await fetch_candle_rows_async(http, symbol, timeframe, limit)
+    return parse_candles(data) if data is not None else None
+
+def timeframe_to_ms(timeframe):
+    units = {"m": 60_000, "h": 3_600_000, "d": 86_400_000}
+    return int(timeframe[:-1]) * units[timeframe[-1]]
+
+def feed_closed_candles(indicators, df, timeframe, closed_through=None):
+    """
+    Feed candles that closed since the last update, oldest first; returns the number fed.
+    closed_through (the newest confirmed candle's timestamp) replaces the wall-clock cutoff when known.
+    """
+    if closed_through is not None:
+        close_cutoff = closed_through
+    else:
+        close_cutoff = pd.Timestamp.now("UTC").tz_localize(None) - pd.Timedelta(milliseconds=timeframe_to_ms(timeframe))
+    new = df[df["timestamp"] <= close_cutoff]  # Skip the still-forming candle
+    if indicators.last_timestamp is not None:
+        new = new[new["timestamp"] > indicators.last_timestamp]
+    for candle in new.to_dict("records"):
+        indicators.update(candle)
+    return len(new)
+
+def seconds_until_next_close(timeframe, delay=CLOSE_DELAY):
+    """Sleep time that wakes `delay` seconds after the next candle boundary."""
+    period = timeframe_to_ms(timeframe) / 1000
+    now = time.time()
+    return (now // period + 1) * period + delay - now
+
+def simple_strategy(df, fast_period=10, slow_period=20, stop_loss_pct=STOP_LOSS_PCT, r_factor=R_FACTOR):
+    """
+    SMA crossover on the latest candles, as in backtesting.simple_moving_average_strategy: "buy" when the
+    fast average crosses above the slow one on the last candle, "sell" when it crosses below, else "hold".
+    Trades enter at the last close with a stop stop_loss_pct away and a target r_factor times further.
+    """
+    close = df["close"]
+    if len(close) <= slow_period:
+        return "hold"
+    above = close.rolling(fast_period).mean() > close.rolling(slow_period).mean()
+    if above.iloc[-1] == above.iloc[-2]:
+        return "hold"
+    side = 1 if above.iloc[-1] else -1
+    entry = float(close.iloc[-1])
+    return {
+        "action": "buy" if side > 0 else "sell",
+        "entry_price": entry,
+        "stop_loss_price": entry * (1 - side * stop_loss_pct),
+        "take_profit_price": entry * (1 + side * stop_loss_pct * r_factor),
+    }
+
+@timed("execute_trade_seconds", "Order placement duration in seconds")
+def execute_trade(symbol, trade_details, risk_per_trade, leverage):
+    if trade_details["action"] == "buy":
+        place_buy_order(
+            symbol=symbol,
+            entry_price=trade_details["entry_price"],
+            stop_loss_price=trade_details["stop_loss_price"],
+            take_profit_price=trade_details["take_profit_price"],
+            risk_amount=risk_per_trade,
+            leverage=leverage,
+        )
+    elif trade_details["action"] == "sell":
+        place_sell_order(
+            symbol=symbol,
+            entry_price=trade_details["entry_price"],
+            stop_loss_price=trade_details["stop_loss_price"],
+            take_profit_price=trade_details["take_profit_price"],
+            risk_amount=risk_per_trade,
+            leverage=leverage,
+        )
+
 # [Keep other functions identical but ensure all file paths use BASE_DIR]
 
 def run_bot():
@@ -53,43 +162,136 @@ def run_bot():
     starting_capital = 10000
     risk_per_trade = 0.02 * starting_capital
     leverage = 10
+    indicators = IndicatorSet()  # O(1) per candle; state carries over between polls
 
     try:
         while True:
-            df = fetch_market_data(symbol, timeframe)
+            with timer("bot_cycle_seconds", "Fetch-to-order duration of one run_bot cycle"):
+                df = fetch_market_data(symbol, timeframe)
+                if df is not None:
+                    if feed_closed_candles(indicators, df, timeframe):
+                        logging.info(f"Indicators: {indicators.values()}")
+
+                    with timer("strategy_seconds"):
+                        trade_details = simple_strategy(df)
+
+                    if isinstance(trade_details, str):
+                        logging.info("No trade signal. Holding...")
+                    else:
+                        execute_trade(symbol, trade_details, risk_per_trade, leverage)
+
             if df is None:
+                count("fetch_failures_total")
                 time.sleep(10)
                 continue
+            time.sleep(300)
+    except KeyboardInterrupt:
+        logging.info("Bot stopped by user")
 
-            trade_details = simple_strategy(df)
-            
-            if isinstance(trade_details, str):
-                logging.info("No trade signal. Holding...")
-                time.sleep(300)
-                continue
+class SymbolState:
+    """Per-instrument live state: streaming indicators plus the latest candles and decision."""
 
-            if trade_details["action"] == "buy":
-                place_buy_order(
-                    symbol=symbol,
-                    entry_price=trade_details["entry_price"],
-                    stop_loss_price=trade_details["stop_loss_price"],
-                    take_profit_price=trade_details["take_profit_price"],
-                    risk_amount=risk_per_trade,
-                    leverage=leverage,
-                )
-            elif trade_details["action"] == "sell":
-                place_sell_order(
-                    symbol=symbol,
-                    entry_price=trade_details["entry_price"],
-                    stop_loss_price=trade_details["stop_loss_price"],
-                    take_profit_price=trade_details["take_profit_price"],
-                    risk_amount=risk_per_trade,
-                    leverage=leverage,
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.indicators = IndicatorSet()
+        self.df = None
+        self.last_action = None
+
+@timed("symbol_cycle_seconds")
+async def run_symbol_cycle(http, state, timeframe, risk_per_trade, leverage, strategy=simple_strategy):
+    """Fetch, update indicators and decide for one symbol after a candle close."""
+    state.last_action = None
+    df = await fetch_market_data_async(http, state.symbol, timeframe)
+    if df is None:
+        count("fetch_failures_total")
+        return
+    state.df = df
+    feed_closed_candles(state.indicators, df, timeframe)
+
+    with timer("strategy_seconds"):
+        trade_details = strategy(df)
+    if isinstance(trade_details, str):
+        state.last_action = "hold"
+        return
+    state.last_action = trade_details["action"]
+    # Order placement is blocking; keep it off the event loop so other symbols are not delayed
+    await asyncio.to_thread(execute_trade, state.symbol, trade_details, risk_per_trade, leverage)
+
+async def run_bot_async(symbols=SYMBOLS, timeframe="5m", starting_capital=10000, leverage=10, max_cycles=None,
+                        strategy=simple_strategy, http=None):
+    """
+    Trade many symbols from one process. Every symbol is polled concurrently right after each
+    candle close over one pooled keep-alive HTTP session, instead of a fixed sleep per symbol.
+    `strategy(df)` returns a trade dict or a string to hold; `http` reuses an existing session.
+    """
+    risk_per_trade = 0.02 * starting_capital
+    states = [SymbolState(symbol) for symbol in symbols]
+
+    if http is None:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=600)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        session_context = aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"X-ACCESS-KEY": API_KEY or ""})
+    else:
+        session_context = nullcontext(http)
+    cycles = 0
+
+    async with session_context as http:
+        while max_cycles is None or cycles < max_cycles:
+            await asyncio.sleep(seconds_until_next_close(timeframe))
+            started = time.monotonic()
+            with timer("bot_cycle_seconds", "Fetch-to-order duration of one run_bot cycle"):
+                results = await asyncio.gather(
+                    *(run_symbol_cycle(http, state, timeframe, risk_per_trade, leverage, strategy) for state in states),
+                    return_exceptions=True,  # One failing symbol must not stop the others
                 )
+            for state, result in zip(states, results):
+                if isinstance(result, Exception):
+                    state.last_action = "error"
+                    logging.error(f"Cycle failed for {state.symbol}: {result!r}")
+            cycles += 1
+            actions = sum(state.last_action in ("buy", "sell") for state in states)
+            logging.info(f"Cycle {cycles}: {len(states)} symbols, {actions} orders, {time.monotonic() - started:.2f}s after close")
+    return states
 
-            time.sleep(300)
-    except KeyboardInterrupt:
-        logging.info("Bot stopped by user")
+async def run_bot_stream(symbols=SYMBOLS, timeframe="5m", starting_capital=10000, leverage=10, ws_url=WS_URL, max_reconnects=None,
+                         strategy=simple_strategy):
+    """
+    Push-driven variant of run_bot_async: candles arrive over the BloFin WebSocket feed into a ring
+    buffer per symbol and the strategy runs the moment a bar is confirmed. The REST endpoint is only
+    used to backfill bars missed while the socket was down.
+    """
+    risk_per_trade = 0.02 * starting_capital
+    states = {symbol: SymbolState(symbol) for symbol in symbols}
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=600)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    @timed("bar_close_seconds")
+    async def on_bar_close(symbol, buffer):
+        state = states[symbol]
+        state.df = buffer.to_frame(closed_only=True)
+        feed_closed_candles(state.indicators, state.df, timeframe, pd.to_datetime(buffer.closed_through, unit="ms"))
+
+        with timer("strategy_seconds"):
+            trade_details = strategy(state.df)
+        if isinstance(trade_details, str):
+            state.last_action = "hold"
+            return
+        state.last_action = trade_details["action"]
+        await asyncio.to_thread(execute_trade, symbol, trade_details, risk_per_trade, leverage)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"X-ACCESS-KEY": API_KEY or ""}) as http:
+        async def backfill(symbol):
+            return await fetch_candle_rows_async(http, symbol, timeframe, limit=100)
+
+        stream = CandleStream(symbols, on_bar_close, backfill, timeframe, ws_url)
+        await stream.run(max_reconnects)
+    return states
 
 if __name__ == "__main__":
-    run_bot()
\ No newline at end of file
+    try:
+        if "--stream" in sys.argv:
+            asyncio.run(run_bot_stream())
+        else:
+            asyncio.run(run_bot_async())
+    except KeyboardInterrupt:
+        logging.info("Bot stopped by user")
\ No newline at end of file
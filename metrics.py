@@ -0,0 +1,76 @@
+import numpy as np
+
+# Crypto markets trade around the clock, so a year is 365 full days of bars
+_UNIT_MINUTES = {"m": 1, "h": 60, "d": 1440, "w": 10080}
+
+
+def periods_per_year(timeframe):
+    """Bars per year for a ccxt-style timeframe such as "5m" or "1h"."""
+    return 365 * 1440 / (int(timeframe[:-1]) * _UNIT_MINUTES[timeframe[-1]])
+
+
+def bar_returns(equity):
+    """Simple per-bar returns of equity curves (rows = bars, optional columns = episodes)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    previous = equity[:-1]
+    # Returns are undefined once equity is wiped out; the drawdown already records the ruin
+    return np.divide(np.diff(equity, axis=0), previous, out=np.zeros_like(previous), where=previous > 0)
+
+
+def sharpe_ratio(equity, periods_per_year=1.0):
+    """Annualized Sharpe of the per-bar returns (zero risk-free rate); 0 for flat curves."""
+    returns = bar_returns(equity)
+    std = returns.std(axis=0)
+    ratio = np.divide(returns.mean(axis=0), std, out=np.zeros_like(std, dtype=np.float64), where=std > 0)
+    return ratio * np.sqrt(periods_per_year)
+
+
+def sortino_ratio(equity, periods_per_year=1.0):
+    """Annualized Sortino: mean return over downside deviation (root mean square of losing bars)."""
+    returns = bar_returns(equity)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2, axis=0))
+    ratio = np.divide(returns.mean(axis=0), downside, out=np.zeros_like(downside, dtype=np.float64), where=downside > 0)
+    return ratio * np.sqrt(periods_per_year)
+
+
+def max_drawdown(equity):
+    """Largest peak-to-trough fall as a positive fraction of the running peak."""
+    equity = np.asarray(equity, dtype=np.float64)
+    peaks = np.maximum.accumulate(equity, axis=0)
+    drawdowns = np.divide(peaks - equity, peaks, out=np.zeros_like(equity), where=peaks > 0)
+    return drawdowns.max(axis=0)
+
+
+def turnover(positions):
+    """Average absolute position change per bar."""
+    return np.abs(np.diff(np.asarray(positions, dtype=np.float64), axis=0)).mean(axis=0)
+
+
+def exposure(positions):
+    """Share of bars spent holding a position."""
+    return (np.asarray(positions) != 0).mean(axis=0)
+
+
+def trade_count(positions):
+    """Number of positions opened."""
+    positions = np.asarray(positions)
+    return ((positions[1:] != 0) & (positions[1:] != positions[:-1])).sum(axis=0)
+
+
+def compute_metrics(equity, positions, periods_per_year=1.0):
+    """All risk metrics for one equity curve (floats) or a steps × episodes matrix (arrays per key)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        raise ValueError(f"❌ ERROR: Need at least 2 equity points for metrics, got {len(equity)}")
+    metrics = {
+        "total_return": (equity[-1] - equity[0]) / equity[0],
+        "sharpe": sharpe_ratio(equity, periods_per_year),
+        "sortino": sortino_ratio(equity, periods_per_year),
+        "max_drawdown": max_drawdown(equity),
+        "turnover": turnover(positions),
+        "exposure": exposure(positions),
+        "trades": trade_count(positions),
+    }
+    if equity.ndim == 1:
+        return {name: value.item() for name, value in metrics.items()}
+    return metrics
@@ -0,0 +1,147 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(x)),
+    "Identity": lambda x: x,
+}
+DEFAULT_CHECKPOINTS = ["checkpoints/*.zip", "models/*.zip", "optimized_trading_agent.zip"]
+
+
+def file_digest(path):
+    """SHA-1 of a file's bytes; ties an export to the exact checkpoint it was made from."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_policy(model_path, out_path=None):
+    """
+    Convert a zipped SB3 PPO checkpoint into a .npz holding only what the deterministic action path
+    needs: the policy MLP's weights, the action head and the action space. Needs torch; running it does not.
+    The checkpoint's hash is kept in the metadata so load_policy can tell when the export is stale.
+    """
+    import torch.nn as nn
+    from gymnasium import spaces
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = model.policy
+    if type(policy.features_extractor).__name__ != "FlattenExtractor":
+        raise ValueError(f"❌ ERROR: Only MlpPolicy checkpoints can be exported, got {type(policy.features_extractor).__name__}")
+
+    arrays, activations = {}, []
+    layers = [module for module in policy.mlp_extractor.policy_net]
+    for module in layers:
+        if isinstance(module, nn.Linear):
+            i = len(activations)
+            arrays[f"w{i}"] = module.weight.detach().numpy().T.astype(np.float32)
+            arrays[f"b{i}"] = module.bias.detach().numpy().astype(np.float32)
+            activations.append("Identity")
+        elif type(module).__name__ in ACTIVATIONS:
+            activations[-1] = type(module).__name__
+        else:
+            raise ValueError(f"❌ ERROR: Unsupported layer in policy network: {module}")
+    arrays["action_w"] = policy.action_net.weight.detach().numpy().T.astype(np.float32)
+    arrays["action_b"] = policy.action_net.bias.detach().numpy().astype(np.float32)
+
+    if isinstance(model.action_space, spaces.Discrete):
+        meta = {"action_space": "Discrete"}
+    elif isinstance(model.action_space, spaces.Box):
+        meta = {"action_space": "Box", "squash_output": bool(policy.squash_output)}
+        arrays["action_low"] = model.action_space.low.astype(np.float32)
+        arrays["action_high"] = model.action_space.high.astype(np.float32)
+    else:
+        raise ValueError(f"❌ ERROR: Unsupported action space {model.action_space}")
+    source = model_path if os.path.exists(model_path) else model_path + ".zip"  # PPO.load adds .zip too
+    meta.update({"activations": activations, "obs_shape": list(model.observation_space.shape), "source": model_path,
+                 "source_sha1": file_digest(source)})
+
+    out_path = out_path or os.path.splitext(model_path)[0] + ".npz"
+    np.savez(out_path, meta=json.dumps(meta), **arrays)
+    print(f"✅ Exported {model_path} -> {out_path} ({os.path.getsize(out_path) / 1024:.0f} KB)")
+    return out_path
+
+
+class NumpyPolicy:
+    """
+    Torch-free deterministic PPO policy loaded from export_policy's .npz.
+    predict() has SB3's signature, so it drops in for model.predict and evaluate_policy.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.meta = json.loads(str(data["meta"]))
+            self.arrays = {name: data[name] for name in data.files if name != "meta"}
+        self.layers = [
+            (self.arrays[f"w{i}"], self.arrays[f"b{i}"], ACTIVATIONS[name])
+            for i, name in enumerate(self.meta["activations"])
+        ]
+        self.obs_shape = tuple(self.meta["obs_shape"])
+
+    def action_logits(self, obs):
+        x = obs.reshape(len(obs), -1)
+        for weight, bias, activation in self.layers:
+            x = activation(x @ weight + bias)
+        return x @ self.arrays["action_w"] + self.arrays["action_b"]
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.shape == self.obs_shape
+        if single:
+            obs = obs[np.newaxis]
+        out = self.action_logits(obs)
+        if self.meta["action_space"] == "Discrete":
+            actions = out.argmax(axis=1)
+        elif self.meta["squash_output"]:
+            low, high = self.arrays["action_low"], self.arrays["action_high"]
+            actions = low + (0.5 * (np.tanh(out) + 1.0) * (high - low))
+        else:
+            actions = np.clip(out, self.arrays["action_low"], self.arrays["action_high"])
+        return (actions[0] if single else actions), state
+
+
+def load_policy(path):
+    """
+    The exported NumPy policy when a .npz sits next to the checkpoint, otherwise the full PPO model.
+    An export whose recorded hash no longer matches the .zip (the checkpoint was retrained in place)
+    is re-exported first, falling back to the .zip if that fails. A .npz without its .zip is used as is.
+    Accepts the path with or without extension, like PPO.load.
+    """
+    from instrumentation import instrument_predict
+
+    base = path[:-4] if path.endswith((".zip", ".npz")) else path
+    zip_path, npz_path = base + ".zip", base + ".npz"
+    if os.path.exists(npz_path):
+        policy = NumpyPolicy(npz_path)
+        if not os.path.exists(zip_path) or policy.meta.get("source_sha1") == file_digest(zip_path):
+            return instrument_predict(policy)
+        print(f"⚠️ {npz_path} was exported from an older {zip_path}; re-exporting")
+        try:
+            return instrument_predict(NumpyPolicy(export_policy(zip_path, npz_path)))
+        except Exception as e:
+            print(f"❌ ERROR re-exporting {zip_path}: {e}; loading the checkpoint instead")
+    from stable_baselines3 import PPO
+    return instrument_predict(PPO.load(base, device="cpu"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export PPO checkpoints to torch-free .npz policies.")
+    parser.add_argument("checkpoints", nargs="*", help=f"Checkpoint zips (default: {' '.join(DEFAULT_CHECKPOINTS)})")
+    args = parser.parse_args()
+
+    paths = args.checkpoints or sorted({p for pattern in DEFAULT_CHECKPOINTS for p in glob.glob(pattern)})
+    for path in paths:
+        try:
+            export_policy(path)
+        except Exception as e:
+            print(f"❌ ERROR exporting {path}: {e}")
@@ -0,0 +1,160 @@
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+
+from data_sources import EpisodeSampler
+from metrics import compute_metrics, periods_per_year
+
+
+class PortfolioArrays:
+    """
+    Time-aligned (time × asset × feature) observation tensor plus the (time × asset) close matrix.
+    `tradable` marks bars where an asset had its own candle; elsewhere prices are carried forward
+    (or the asset is not listed yet) and the env will not open new positions in it.
+    """
+
+    def __init__(self, obs, close, tradable, assets):
+        self.obs = np.ascontiguousarray(obs, dtype=np.float32)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.tradable = np.ascontiguousarray(tradable, dtype=bool)
+        self.assets = list(assets)
+        if self.obs.shape[:2] != self.close.shape or self.close.shape != self.tradable.shape:
+            raise ValueError(f"❌ ERROR: Misaligned shapes obs {self.obs.shape}, close {self.close.shape}, tradable {self.tradable.shape}")
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Align {asset: feature frame} on the union of their timestamps. Gaps are forward-filled;
+        bars before an asset's first candle get zero observations and stay untradable.
+        """
+        index = pd.DatetimeIndex(sorted(set().union(*(df["timestamp"] for df in frames.values()))))
+        obs, close, tradable = [], [], []
+        for df in frames.values():
+            aligned = df.set_index("timestamp").reindex(index)
+            tradable.append(aligned["close"].notna().to_numpy())
+            aligned = aligned.ffill()
+            close.append(aligned["close"].to_numpy(dtype=np.float64))
+            obs.append(aligned.fillna(0).to_numpy(dtype=np.float32))
+        close = np.stack(close, axis=1)
+        return cls(np.stack(obs, axis=1), np.nan_to_num(close), np.stack(tradable, axis=1), frames.keys())
+
+    def __len__(self):
+        return len(self.close)
+
+
+def load_universe(pairs, exchange="kraken", timeframe="5m"):
+    """
+    PortfolioArrays for store datasets, e.g. the pairs from data_pipeline.fetch_kraken_pairs()
+    once sync_all_pairs_async has downloaded them.
+    """
+    from data_store import read_candles
+    from features import add_features, cache_name
+
+    frames = {}
+    for pair in pairs:
+        dataset = (exchange, pair, timeframe)
+        frames[pair] = add_features(read_candles(*dataset), name=cache_name(dataset))
+    return PortfolioArrays.from_frames(frames)
+
+
+class PortfolioEnv(gym.Env):
+    """
+    TradingEnv generalized to many assets sharing one cash balance. The action is one
+    hold/buy/sell choice per asset; every position is sized as trade_risk of margin at `leverage`,
+    and new entries are refused once gross exposure would exceed balance × leverage.
+    All per-asset bookkeeping is array math, so a step costs a few NumPy calls whatever the asset count.
+    """
+
+    metadata = {"render_modes": ["human"], "render_fps": 1}
+
+    def __init__(self, universe, initial_balance=100, leverage=5, trade_risk=1, episode_length=None,
+                 start_mode="random", timeframe="5m", render_mode="human"):
+        super().__init__()
+        self.universe = universe
+        self.n_assets = universe.close.shape[1]
+        self.initial_balance = initial_balance
+        self.leverage = leverage
+        self.trade_risk = trade_risk  # Margin committed per position
+        self.episode_length = episode_length if episode_length is not None else len(universe) - 1
+        self.sampler = EpisodeSampler([(0, len(universe))], episode_length, start_mode) if episode_length is not None else None
+        self.periods_per_year = periods_per_year(timeframe)
+        self.render_mode = render_mode
+
+        self.action_space = spaces.MultiDiscrete([3] * self.n_assets)  # Per asset: 0 hold, 1 buy, 2 sell
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=universe.obs.shape[1:], dtype=np.float32)
+
+        self.position = np.zeros(self.n_assets, dtype=np.int8)
+        self.quantity = np.zeros(self.n_assets, dtype=np.float64)
+        self.entry_price = np.zeros(self.n_assets, dtype=np.float64)
+        self.equity = np.empty(self.episode_length + 1, dtype=np.float64)
+        self.open_positions = np.zeros(self.episode_length + 1, dtype=np.int64)
+        self.n_recorded = 0
+        self.n_trades = 0
+        self.episode_start = 0
+        self.current_step = 0
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.episode_start = int(self.sampler.sample(1, self.np_random)[0]) if self.sampler is not None else 0
+        self.current_step = self.episode_start
+        self.balance = float(self.initial_balance)
+        self.portfolio_value = self.balance
+        self.position[:] = 0
+        self.quantity[:] = 0
+        self.entry_price[:] = 0
+        self.n_recorded = 0
+        self.n_trades = 0
+        self._record()
+        return self.universe.obs[self.current_step], {"episode_start": self.episode_start}
+
+    def _record(self):
+        self.equity[self.n_recorded] = self.portfolio_value
+        self.open_positions[self.n_recorded] = self.position.sum()
+        self.n_recorded += 1
+
+    def step(self, action):
+        self.current_step += 1
+        price = self.universe.close[self.current_step]
+        action = np.asarray(action)
+
+        # Close longs first so the freed margin is available to this bar's entries
+        sells = (action == 2) & (self.position == 1)
+        realized = float(np.dot(self.quantity[sells], price[sells] - self.entry_price[sells]))
+        self.balance += realized
+        self.position[sells] = 0
+        self.quantity[sells] = 0
+
+        buys = (action == 1) & (self.position == 0) & self.universe.tradable[self.current_step]
+        if buys.any():
+            notional = self.trade_risk * self.leverage
+            room = (max(self.balance, 0.0) * self.leverage - np.dot(self.quantity, price)) // notional
+            candidates = np.flatnonzero(buys)
+            if room < len(candidates):  # Gross exposure cap: fill in asset order until it is reached
+                buys[:] = False
+                buys[candidates[:max(int(room), 0)]] = True
+            self.position[buys] = 1
+            self.entry_price[buys] = price[buys]
+            self.quantity[buys] = notional / price[buys]
+            self.n_trades += int(buys.sum())
+
+        self.portfolio_value = self.balance + float(np.dot(self.quantity, price - self.entry_price))
+        self._record()
+        done = self.n_recorded > self.episode_length
+        info = {"portfolio_value": self.portfolio_value, "open_positions": int(self.position.sum())}
+        if done:
+            info["metrics"] = self.episode_metrics()
+        return self.universe.obs[self.current_step], realized, done, False, info
+
+    def equity_curve(self):
+        return self.equity[:self.n_recorded]
+
+    def episode_metrics(self):
+        """Portfolio-level metrics; turnover/exposure count open positions rather than a single flag."""
+        metrics = compute_metrics(self.equity_curve(), self.open_positions[:self.n_recorded], self.periods_per_year)
+        metrics["trades"] = self.n_trades
+        return metrics
+
+    def render(self):
+        print(f"Step: {self.current_step} | Balance: {self.balance:.2f} | Open positions: {int(self.position.sum())} "
+              f"| Portfolio Value: {self.portfolio_value:.2f}")
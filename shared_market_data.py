@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from trading_env import MarketArrays
+
+
+def publish_market_arrays(market, directory=None):
+    """
+    Write the observation matrix and price vectors once as .npy files.
+    Worker processes attach to them with attach_market_arrays instead of receiving a pickled copy.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="market_arrays_")
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "obs.npy"), market.obs)
+    np.save(os.path.join(directory, "close.npy"), market.close)
+    for name in MarketArrays.PRICE_COLUMNS:
+        if getattr(market, name) is not None:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(market, name))
+    return directory
+
+
+def attach_market_arrays(directory):
+    """Memory-map published arrays read-only; every process shares the same page-cache copy."""
+    obs = np.load(os.path.join(directory, "obs.npy"), mmap_mode="r")
+    close = np.load(os.path.join(directory, "close.npy"), mmap_mode="r")
+    prices = {}
+    for name in MarketArrays.PRICE_COLUMNS:
+        path = os.path.join(directory, f"{name}.npy")
+        if os.path.exists(path):  # Only published when the source frame had them
+            prices[name] = np.load(path, mmap_mode="r")
+    return MarketArrays(obs, close, **prices)
+
+
+@contextmanager
+def shared_market_arrays(market):
+    """Publish arrays for the duration of a with-block and remove the files afterwards."""
+    directory = publish_market_arrays(market)
+    try:
+        yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,220 @@
+import math
+from collections import deque
+
+import numpy as np
+
+from features import FEATURE_SPEC
+
+# Same thresholds as TA-Lib's TA_IS_ZERO / TA_IS_ZERO_OR_NEG macros
+_EPSILON = 0.00000001
+
+
+class SMA:
+    """O(1) simple moving average; same running-sum arithmetic as TA-Lib's SMA, so values are bit-identical."""
+
+    def __init__(self, timeperiod=30):
+        self.timeperiod = timeperiod
+        self.window = deque()
+        self.total = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        self.window.append(x)
+        if len(self.window) < self.timeperiod:
+            self.total += x
+            return self.value
+        self.total += x
+        self.value = self.total / self.timeperiod
+        self.total -= self.window.popleft()
+        return self.value
+
+
+class EMA:
+    """O(1) exponential moving average seeded with the SMA of the first period, as TA-Lib does."""
+
+    def __init__(self, timeperiod=30):
+        self.timeperiod = timeperiod
+        self.k = 2.0 / (timeperiod + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        self.count += 1
+        if self.count < self.timeperiod:
+            self.seed_total += x
+        elif self.count == self.timeperiod:
+            self.seed_total += x
+            self.value = self.seed_total / self.timeperiod
+        else:
+            self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+
+class RSI:
+    """O(1) Wilder RSI following TA-Lib's gain/loss smoothing order of operations."""
+
+    def __init__(self, timeperiod=14):
+        self.timeperiod = timeperiod
+        self.count = 0
+        self.prev_value = math.nan
+        self.prev_gain = 0.0
+        self.prev_loss = 0.0
+        self.value = math.nan
+
+    def _output(self):
+        total = self.prev_gain + self.prev_loss
+        self.value = 100.0 * (self.prev_gain / total) if not -_EPSILON < total < _EPSILON else 0.0
+
+    def update(self, x):
+        self.count += 1
+        if self.count == 1:
+            self.prev_value = x
+            return self.value
+        change = x - self.prev_value
+        self.prev_value = x
+
+        if self.count <= self.timeperiod + 1:
+            if change < 0:
+                self.prev_loss -= change
+            else:
+                self.prev_gain += change
+            if self.count == self.timeperiod + 1:
+                self.prev_loss /= self.timeperiod
+                self.prev_gain /= self.timeperiod
+                self._output()
+            return self.value
+
+        self.prev_loss *= (self.timeperiod - 1)
+        self.prev_gain *= (self.timeperiod - 1)
+        if change < 0:
+            self.prev_loss -= change
+        else:
+            self.prev_gain += change
+        self.prev_loss /= self.timeperiod
+        self.prev_gain /= self.timeperiod
+        self._output()
+        return self.value
+
+
+class ATR:
+    """O(1) Wilder average true range; the first value is the SMA of the first period's true ranges."""
+
+    def __init__(self, timeperiod=14):
+        self.timeperiod = timeperiod
+        self.count = 0
+        self.prev_close = math.nan
+        self.seed_total = 0.0
+        self.value = math.nan
+
+    def update(self, high, low, close):
+        self.count += 1
+        prev_close, self.prev_close = self.prev_close, close
+        if self.count == 1:
+            return self.value
+
+        true_range = high - low
+        if abs(prev_close - high) > true_range:
+            true_range = abs(prev_close - high)
+        if abs(prev_close - low) > true_range:
+            true_range = abs(prev_close - low)
+
+        if self.count <= self.timeperiod + 1:
+            self.seed_total += true_range
+            if self.count == self.timeperiod + 1:
+                self.value = self.seed_total / self.timeperiod
+            return self.value
+
+        value = self.value * (self.timeperiod - 1)
+        value += true_range
+        self.value = value / self.timeperiod
+        return self.value
+
+
+class RollingStd:
+    """
+    O(1) population standard deviation over a window, matching TA-Lib's STDDEV (nbdev=1).
+    Sums are kept of deviations from a shift near the window mean rather than of raw prices, since
+    E[x²] - E[x]² at BTC price levels cancels away most of the digits. Every timeperiod updates the shift
+    moves to the current window mean and the sums are rebuilt from the window, so rounding never
+    accumulates; amortized cost stays O(1).
+    """
+
+    def __init__(self, timeperiod=5, nbdev=1.0):
+        self.timeperiod = timeperiod
+        self.nbdev = nbdev
+        self.window = deque()
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_rebuild = 0
+        self.value = math.nan
+
+    def _rebuild(self):
+        self.shift = sum(self.window) / len(self.window)
+        deviations = [x - self.shift for x in self.window]
+        self.total = sum(deviations)
+        self.total_sq = sum(d * d for d in deviations)
+        self.since_rebuild = 0
+
+    def update(self, x):
+        if self.shift is None:
+            self.shift = x
+        self.window.append(x)
+        deviation = x - self.shift
+        self.total += deviation
+        self.total_sq += deviation * deviation
+        if len(self.window) < self.timeperiod:
+            return self.value
+
+        mean = self.total / self.timeperiod
+        variance = self.total_sq / self.timeperiod - (mean * mean)
+        oldest = self.window.popleft() - self.shift
+        self.total -= oldest
+        self.total_sq -= oldest * oldest
+        self.since_rebuild += 1
+        if self.since_rebuild >= self.timeperiod and self.window:
+            self._rebuild()
+
+        if variance < _EPSILON:
+            self.value = 0.0
+        elif self.nbdev != 1.0:
+            self.value = math.sqrt(variance) * self.nbdev
+        else:
+            self.value = math.sqrt(variance)
+        return self.value
+
+
+INDICATORS = {"SMA": SMA, "EMA": EMA, "RSI": RSI, "ATR": ATR, "STDDEV": RollingStd}
+
+
+class IndicatorSet:
+    """
+    Streaming counterpart of features.compute_features: one incremental indicator per spec entry,
+    fed one candle at a time. Live decision latency stays constant regardless of lookback length.
+    """
+
+    def __init__(self, spec=FEATURE_SPEC):
+        self.spec = spec
+        self.indicators = [INDICATORS[f["function"]](**f["params"]) for f in spec]
+        self.last_timestamp = None
+
+    def update(self, candle):
+        """Feed one closed candle (mapping with OHLCV keys); returns {feature name: value}."""
+        for feature, indicator in zip(self.spec, self.indicators):
+            indicator.update(*(float(candle[column]) for column in feature["inputs"]))
+        if "timestamp" in candle:
+            self.last_timestamp = candle["timestamp"]
+        return self.values()
+
+    def values(self):
+        return {feature["name"]: indicator.value for feature, indicator in zip(self.spec, self.indicators)}
+
+    def vector(self):
+        return np.array([indicator.value for indicator in self.indicators], dtype=np.float64)
+
+    def warm_up(self, df):
+        """Replay historical candles (oldest first) to build state before going live."""
+        for candle in df.to_dict("records"):
+            self.update(candle)
+        return self.values()
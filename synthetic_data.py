@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+
+def make_synthetic_ohlcv(n_rows, start_price=30000.0, freq="5min", seed=0):
+    """
+    Generate a random-walk OHLCV frame with the same columns data_pipeline writes.
+    Used by the benchmarks so they run without network access or data files.
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0, 0.002, size=n_rows)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.001, size=n_rows)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(mean=2.0, sigma=1.0, size=n_rows)
+
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2020-01-01", periods=n_rows, freq=freq),
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    })
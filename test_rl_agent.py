@@ -1,9 +1,10 @@
 import gymnasium as gym
 import numpy as np
-from stable_baselines3 import PPO
+from data_store import read_candles
+from features import add_features, cache_name
+from policy_export import load_policy
 from trading_env import TradingEnv
 import os
-import pandas as pd
 
 # ✅ Define model paths
 MODEL_PATHS = {
@@ -13,8 +14,8 @@ MODEL_PATHS = {
 }
 
 # ✅ Load dataset
-DATA_FILE = "data/BTC-USD.csv"
-df = pd.read_csv(DATA_FILE)
+DATASET = ("kraken", "BTC/USD", "5m")
+df = add_features(read_candles(*DATASET), name=cache_name(DATASET))
 
 # ✅ Initialize trading environment with correct rendering
 env = TradingEnv(df, render_mode="rgb_array")  # ✅ FIXED
@@ -32,7 +33,7 @@ def test_model(model_path, model_name):
     print(f"🚀 Testing {model_name} ({model_path})")
     
     # Load trained model
-    model = PPO.load(model_path, env=env)
+    model = load_policy(model_path)  # Exported NumPy policy if present, else PPO.load
     
     obs, _ = env.reset()  # ✅ FIXED: Gymnasium now returns (obs, info)
     done = False
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting import backtest_strategy, backtest_strategy_iterative, simple_moving_average_strategy
+from synthetic_data import make_synthetic_ohlcv
+
+
+@pytest.fixture(scope="module")
+def strategy_df():
+    return simple_moving_average_strategy(make_synthetic_ohlcv(20_000, seed=1))
+
+
+# The default (degenerate) sizing exercises the fallback path, a small risk the fast path
+@pytest.mark.parametrize("risk_per_trade", [100, 0.01])
+def test_vectorized_backtest_matches_per_row_loop(strategy_df, risk_per_trade):
+    expected_balance, expected_log = backtest_strategy_iterative(strategy_df, risk_per_trade=risk_per_trade)
+    balance, trade_log = backtest_strategy(strategy_df, risk_per_trade=risk_per_trade)
+
+    assert len(trade_log) > 0
+    assert balance == expected_balance or (np.isnan(balance) and np.isnan(expected_balance))
+    pd.testing.assert_frame_equal(trade_log, expected_log)
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from inference_server import PolicyServer
+
+
+class SlowPolicy:
+    """Stand-in policy: action = sum of the observation; each forward pass waits until released."""
+
+    obs_shape = (3,)
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict(self, obs, deterministic=True):
+        self.release.wait()
+        return obs.sum(axis=1), None
+
+
+def test_cancelled_request_does_not_kill_worker():
+    policy = SlowPolicy()
+    with PolicyServer(policy, max_wait_ms=1) as server:
+        policy.release.clear()
+        blocker = server.submit(np.ones(3))  # Occupies the worker
+
+        async def timed_out():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(server.predict_async(np.ones(3)), timeout=0.05)
+
+        asyncio.run(timed_out())  # Cancels its future while it is still queued
+        policy.release.set()
+
+        assert blocker.result(timeout=5) == 3.0
+        assert server.predict(np.full(3, 2.0), timeout=5) == 6.0
+        assert server.worker.is_alive()
+
+
+def test_bad_shape_is_rejected_without_failing_the_batch():
+    with PolicyServer(SlowPolicy(), max_wait_ms=20) as server:
+        good = [server.submit(np.full(3, i)) for i in range(4)]
+        with pytest.raises(ValueError):
+            server.submit(np.ones(5))
+        assert [future.result(timeout=5) for future in good] == [0.0, 3.0, 6.0, 9.0]
+        assert server.worker.is_alive()
+
+
+def test_stop_fails_queued_requests():
+    policy = SlowPolicy()
+    server = PolicyServer(policy, max_batch_size=1).start()
+    policy.release.clear()
+    first = server.submit(np.ones(3))
+    queued = [server.submit(np.ones(3)) for _ in range(3)]
+
+    stopper = threading.Thread(target=server.stop)
+    stopper.start()
+    while server.running:  # stop() has been called while the worker is still busy with `first`
+        pass
+    policy.release.set()
+    stopper.join(timeout=5)
+
+    assert not stopper.is_alive()
+    assert first.result(timeout=5) == 3.0
+    for future in queued:
+        assert isinstance(future.exception(timeout=0), RuntimeError)
+    with pytest.raises(RuntimeError):
+        server.submit(np.ones(3))
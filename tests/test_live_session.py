@@ -0,0 +1,21 @@
+import numpy as np
+
+from live_session import MAX_CHART_POINTS, ChartFeed, TradingSession
+
+
+def test_chart_feed_rebuilds_rarely():
+    session = TradingSession(env=None, model=None)
+    feed = ChartFeed(session, MAX_CHART_POINTS)
+    n_steps = 5 * MAX_CHART_POINTS
+    chart = []
+    for step in range(n_steps):
+        with session.lock:
+            session.history.append((step, 100 + np.sin(step / 50)))
+        rebuild, steps, values = feed.poll()  # Worst case for rebuilds: one point per refresh
+        chart = list(steps) if rebuild else chart + list(steps)
+        assert len(chart) <= MAX_CHART_POINTS
+        assert chart[-1] == step  # Every new point reaches the chart
+
+    # One rebuild per MAX_CHART_POINTS // 2 appended points, not one per refresh
+    assert feed.rebuilds <= 2 + n_steps // (MAX_CHART_POINTS // 2)
+    assert np.all(np.diff(chart) > 0)
@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import os
+
+import pandas as pd
+import pytest
+
+# Close-price level each stub symbol trades at; the stub strategy decides by it
+PRICES = {"BTC-USDT": 100.0, "ETH-USDT": 200.0, "SOL-USDT": 300.0}
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # main.py creates its log directory relative to the working directory on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("main"))
+    try:
+        yield importlib.import_module("main")
+    finally:
+        os.chdir(cwd)
+
+
+class StubResponse:
+    def __init__(self, status, payload):
+        self.status = status
+        self.payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.payload
+
+    async def text(self):
+        return str(self.payload)
+
+
+class StubSession:
+    """aiohttp.ClientSession stand-in serving 30 closed candles per known symbol, HTTP 500 otherwise."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, params=None):
+        symbol = params["instId"]
+        self.requests.append(symbol)
+        if symbol not in PRICES:
+            return StubResponse(500, {"msg": "unknown instrument"})
+        start, price = 1_700_000_000_000, PRICES[symbol]
+        rows = [[str(start + i * 300_000), price, price, price, price, 1.0, "0", "0", "1"] for i in range(30)]
+        return StubResponse(200, {"data": rows[::-1]})  # Newest first, like BloFin
+
+
+def stub_strategy(df):
+    price = df["close"].iloc[-1]
+    if price == PRICES["BTC-USDT"]:
+        return {"action": "buy", "entry_price": price, "stop_loss_price": price * 0.99, "take_profit_price": price * 1.02}
+    if price == PRICES["ETH-USDT"]:
+        return "hold"
+    raise RuntimeError("strategy failed")
+
+
+def test_run_bot_async_one_cycle(main, monkeypatch):
+    orders = []
+    monkeypatch.setattr(main, "seconds_until_next_close", lambda timeframe: 0)
+    monkeypatch.setattr(main, "execute_trade", lambda symbol, details, risk, leverage: orders.append((symbol, details)))
+    http = StubSession()
+    symbols = [*PRICES, "BAD-USDT"]
+
+    states = asyncio.run(main.run_bot_async(symbols, max_cycles=1, strategy=stub_strategy, http=http))
+
+    assert sorted(http.requests) == sorted(symbols)
+    actions = {state.symbol: state.last_action for state in states}
+    # A failed fetch skips the symbol; a raising strategy is isolated to its own symbol
+    assert actions == {"BTC-USDT": "buy", "ETH-USDT": "hold", "SOL-USDT": "error", "BAD-USDT": None}
+    assert [symbol for symbol, _ in orders] == ["BTC-USDT"]
+    assert all(len(state.df) == 30 for state in states if state.symbol in PRICES)
+
+
+def test_simple_strategy_trades_crossovers_only(main):
+    close = [100.0 - i for i in range(25)] + [200.0]  # Fast SMA crosses above the slow one on the last bar
+    assert main.simple_strategy(pd.DataFrame({"close": close[:-1]})) == "hold"
+    trade = main.simple_strategy(pd.DataFrame({"close": close}))
+    assert trade["action"] == "buy"
+    assert trade["stop_loss_price"] < trade["entry_price"] < trade["take_profit_price"]
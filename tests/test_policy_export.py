@@ -0,0 +1,42 @@
+import numpy as np
+from stable_baselines3 import PPO
+
+from policy_export import NumpyPolicy, export_policy, load_policy
+from synthetic_data import make_synthetic_ohlcv
+from vec_trading_env import VecTradingEnv
+
+
+def save_model(path, seed):
+    env = VecTradingEnv(make_synthetic_ohlcv(200), n_envs=1)
+    model = PPO("MlpPolicy", env, seed=seed, verbose=0, device="cpu")
+    model.save(path)
+    return model
+
+
+def action_weights(model):
+    return model.policy.action_net.weight.detach().numpy().T
+
+
+def test_load_policy_reexports_after_checkpoint_is_overwritten(tmp_path):
+    base = str(tmp_path / "agent")
+    save_model(base, seed=0)
+    export_policy(base + ".zip")
+    assert isinstance(load_policy(base), NumpyPolicy)
+
+    retrained = save_model(base, seed=1)  # Overwrites agent.zip in place, as train_rl_agent.py does
+    policy = load_policy(base)
+
+    assert isinstance(policy, NumpyPolicy)
+    np.testing.assert_allclose(policy.arrays["action_w"], action_weights(retrained), rtol=1e-6)
+    np.testing.assert_allclose(NumpyPolicy(base + ".npz").arrays["action_w"], action_weights(retrained), rtol=1e-6)
+
+    obs = np.random.default_rng(0).normal(size=(32, *policy.obs_shape)).astype(np.float32)
+    np.testing.assert_array_equal(policy.predict(obs)[0], retrained.predict(obs, deterministic=True)[0])
+
+
+def test_load_policy_uses_export_without_checkpoint(tmp_path):
+    base = str(tmp_path / "agent")
+    save_model(base, seed=0)
+    export_policy(base + ".zip")
+    (tmp_path / "agent.zip").unlink()
+    assert isinstance(load_policy(base), NumpyPolicy)
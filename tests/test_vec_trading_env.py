@@ -0,0 +1,85 @@
+import numpy as np
+
+import vec_trading_env
+from execution import EXIT_SIGNAL, EXIT_STOP, EXIT_TARGET, ExecutionModel
+from synthetic_data import make_synthetic_ohlcv
+from trading_env import TradingEnv
+from vec_trading_env import VecTradingEnv
+
+
+def run_actions(env, actions):
+    env.reset()
+    for row in actions:
+        env.step_async(row)
+        env.step_wait()
+
+
+def test_whole_history_equity_grows_instead_of_preallocating(monkeypatch):
+    df = make_synthetic_ohlcv(3_000, seed=2)
+    actions = np.random.default_rng(0).integers(0, 3, size=(2_500, 4))
+
+    monkeypatch.setattr(vec_trading_env, "HISTORY_CAPACITY", 100)
+    small = VecTradingEnv(df, n_envs=4, random_start=False)
+    assert small.equity.shape == (100, 4)
+    run_actions(small, actions)
+
+    monkeypatch.setattr(vec_trading_env, "HISTORY_CAPACITY", 10_000)
+    full = VecTradingEnv(df, n_envs=4, random_start=False)
+    run_actions(full, actions)
+
+    assert 100 < len(small.equity) <= len(df)
+    for i in range(4):
+        np.testing.assert_array_equal(small.equity_curve(i), full.equity_curve(i))
+        assert small.episode_metrics(i) == full.episode_metrics(i)
+
+
+def bracket_actions(n_steps, n_envs, hold, seed):
+    """Each env buys at random bars and sells `hold` bars later, never buying while a trade is open."""
+    rng = np.random.default_rng(seed)
+    actions = np.zeros((n_steps, n_envs), dtype=np.int64)
+    for i in range(n_envs):
+        step = int(rng.integers(0, hold))
+        while step + hold < n_steps:
+            actions[step, i], actions[step + hold, i] = 1, 2
+            step += hold + 1 + int(rng.integers(0, hold))
+    return actions
+
+
+def test_execution_matches_trading_env_and_simulate_trades():
+    df = make_synthetic_ohlcv(1_500, seed=5)
+    execution = ExecutionModel(range_slippage=0.1)
+    actions = bracket_actions(len(df) - 2, 4, hold=40, seed=1)
+
+    vec = VecTradingEnv(df, n_envs=4, random_start=False, execution=execution)
+    run_actions(vec, actions)
+
+    market = vec.market
+    reasons = []
+    for i in range(4):
+        env = TradingEnv(df, execution=execution, render_mode=None)
+        env.reset()
+        for action in actions[:, i]:
+            env.step(action)
+        np.testing.assert_array_equal(vec.equity_curve(i), env.equity_curve())
+
+        # Actions run on bars 1.., so a buy at row t opens at the close of bar t + 1
+        entry_bars = np.flatnonzero(actions[:, i] == 1) + 1
+        exit_bars = np.flatnonzero(actions[:, i] == 2) + 1
+        entry, _, stop, target, _ = execution.open_bracket(
+            market.close[entry_bars], 1, 1, 0.01, 2, np.inf, market.high[entry_bars], market.low[entry_bars])
+        fills = execution.simulate_trades(market.open, market.high, market.low, market.close, entry_bars, exit_bars,
+                                          stop, target)
+        signal_price = execution.market_fill(market.close[exit_bars], -1, market.high[exit_bars], market.low[exit_bars])
+        exit_price = np.where(fills["reason"] == EXIT_SIGNAL, signal_price, fills["exit_price"])
+
+        # Equity is flat from the bar after an exit until the next entry; its jump at the exit is the net P&L
+        equity = vec.equity_curve(i)
+        quantity = 1 / (entry * 0.01)
+        fee = quantity * exit_price * execution.exit_fee_rate(fills["reason"])
+        profit = quantity * (exit_price - entry) - fee
+        balance_before = equity[entry_bars - 1]
+        entry_fee = quantity * entry * execution.taker_fee
+        np.testing.assert_allclose(equity[fills["exit_bar"]], balance_before - entry_fee + profit, rtol=1e-12)
+        reasons.extend(fills["reason"])
+
+    assert {EXIT_STOP, EXIT_TARGET, EXIT_SIGNAL} <= set(reasons)
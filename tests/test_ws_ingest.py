@@ -0,0 +1,70 @@
+import asyncio
+import socket
+
+import aiohttp
+import numpy as np
+
+from fake_blofin import CANDLES_PATH, FakeBlofin
+from ws_ingest import CandleStream
+
+SYMBOLS = ["BTC-USDT", "ETH-USDT"]
+TIMEFRAME_MS = 300_000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def stream_against_fake(on_bar_close, max_reconnects=2):
+    """Run CandleStream against a FakeBlofin that drops every socket every 5 bars; returns (server, stream)."""
+    ws_port, http_port = free_port(), free_port()
+    server = FakeBlofin(SYMBOLS, bar_seconds=0.08, updates_per_bar=2, drop_every=5, outage_bars=2)
+    serving = asyncio.create_task(server.serve(ws_port=ws_port, http_port=http_port))
+    await asyncio.sleep(0.2)
+
+    async with aiohttp.ClientSession() as http:
+        async def backfill(symbol):
+            params = {"instId": symbol, "interval": "5m", "limit": "100"}
+            async with http.get(f"http://127.0.0.1:{http_port}{CANDLES_PATH}", params=params) as response:
+                return (await response.json())["data"]
+
+        stream = CandleStream(SYMBOLS, on_bar_close, backfill, "5m", f"ws://127.0.0.1:{ws_port}")
+        try:
+            await asyncio.wait_for(stream.run(max_reconnects), timeout=30)
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+    return server, stream
+
+
+def closed_bars(buffer):
+    df = buffer.to_frame(closed_only=True)
+    return df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64), df["close"].to_numpy()
+
+
+def test_stream_reconnects_and_gap_fills_without_duplicates_or_holes():
+    notified = {symbol: [] for symbol in SYMBOLS}
+    failed = []
+
+    def on_bar_close(symbol, buffer):
+        notified[symbol].append(buffer.closed_through)
+        if symbol == "ETH-USDT" and len(notified[symbol]) == 2:
+            failed.append(buffer.closed_through)
+            raise RuntimeError("handler failed")  # Must be logged, not end the stream
+
+    server, stream = asyncio.run(stream_against_fake(on_bar_close))
+
+    assert server.connections == 3  # Initial connection plus one reconnect per drop
+    assert failed  # The handler raised, and the stream carried on
+    for symbol in SYMBOLS:
+        # One notification per closed bar at most: closed_through only moves forward
+        assert np.all(np.diff(notified[symbol]) > 0)
+        assert any(ts > failed[0] for ts in notified[symbol])
+
+        timestamps, closes = closed_bars(stream.buffers[symbol])
+        assert len(timestamps) > 10
+        assert np.all(np.diff(timestamps) == TIMEFRAME_MS)  # No duplicate and no missing bar across the outages
+        history = {int(row[0]): float(row[4]) for row in server.history[symbol] if row[8] == "1"}
+        assert [history[ts] for ts in timestamps] == list(closes)  # Final values, as the exchange confirmed them
@@ -4,18 +4,75 @@ import pandas as pd
 from gymnasium import spaces
 from stable_baselines3.common.monitor import Monitor
 
+from execution import EXIT_NONE, EXIT_SIGNAL
+from instrumentation import timed
+from metrics import compute_metrics, periods_per_year
+
+LIVE_EQUITY_CAPACITY = 4096  # Initial equity buffer in live mode, doubled when full
+
+
+class MarketArrays:
+    """
+    Contiguous float32 observation matrix plus the close-price vector the env trades on.
+    open/high/low are optional float64 vectors, only needed to simulate stop-loss/take-profit fills.
+    """
+
+    PRICE_COLUMNS = ("open", "high", "low")
+
+    def __init__(self, obs, close, open=None, high=None, low=None):
+        self.obs = np.ascontiguousarray(obs, dtype=np.float32)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        if len(self.obs) != len(self.close):
+            raise ValueError(f"\u274c ERROR: obs has {len(self.obs)} rows but close has {len(self.close)}")
+        for name, values in zip(self.PRICE_COLUMNS, (open, high, low)):
+            setattr(self, name, None if values is None else np.ascontiguousarray(values, dtype=np.float64))
+
+    @classmethod
+    def from_frame(cls, df):
+        """Convert an OHLCV frame once, keeping the same column layout as the per-step observations."""
+        features = df.drop(columns="timestamp", errors="ignore")
+        prices = {name: df[name].to_numpy(dtype=np.float64) for name in cls.PRICE_COLUMNS if name in df}
+        return cls(features.to_numpy(dtype=np.float32), df["close"].to_numpy(dtype=np.float64), **prices)
+
+    @property
+    def has_ohlc(self):
+        return self.high is not None and self.low is not None and self.open is not None
+
+    def rows(self, start, stop):
+        """Zero-copy view of rows [start, stop)."""
+        prices = {name: getattr(self, name)[start:stop] for name in self.PRICE_COLUMNS if getattr(self, name) is not None}
+        return MarketArrays(self.obs[start:stop], self.close[start:stop], **prices)
+
+    def __len__(self):
+        return len(self.close)
+
+
 class TradingEnv(gym.Env):
     """A trading environment for reinforcement learning with risk-based rewards and penalties."""
 
     metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 1}
 
-    def __init__(self, df, initial_balance=100, leverage=5, live_mode=False, render_mode="human"):
+    def __init__(self, df, initial_balance=100, leverage=5, live_mode=False, render_mode="human", use_arrays=True, timeframe="5m",
+                 episode_length=None, start_mode="random", execution=None, stop_loss_pct=0.01):
         super().__init__()
-        
-        self.df = df.copy()
+
+        # Array mode converts the frame once; observations are then zero-copy row views.
+        # Passing MarketArrays directly (e.g. memory-mapped by a worker process) skips the frame entirely,
+        # and a data_sources source (ArraySource/StoreSource) serves each episode's window on demand.
+        self.source = df if hasattr(df, "window") else None
+        self.use_arrays = use_arrays or isinstance(df, MarketArrays) or self.source is not None
+        if self.source is not None:
+            self.df = None
+            self.market = None
+        elif isinstance(df, MarketArrays):
+            self.df = None
+            self.market = df
+        else:
+            self.df = df if use_arrays else df.copy()
+            self.market = None
         self.initial_balance = initial_balance
         self.leverage = leverage  # Adjusted to Kraken's max leverage
-        self.live_mode = live_mode  # Placeholder for live trading integration
+        self.live_mode = live_mode  # Observations come from push_candle() instead of the dataset
         self.render_mode = render_mode  # ✅ Now supported in __init__
         self.current_step = 0
         self.balance = initial_balance
@@ -24,6 +81,15 @@ class TradingEnv(gym.Env):
         self.portfolio_value = initial_balance
         self.r_factor = 2  # Reward-to-risk ratio enforcement
         self.trade_risk = 1  # Adjusted risk per trade to $1 (1% risk per trade)
+        self.periods_per_year = periods_per_year(timeframe)  # Annualizes per-bar Sharpe/Sortino
+
+        # Opt-in execution.ExecutionModel: buys open a stop-loss/take-profit bracket sized to lose trade_risk
+        # at the stop, fills pay fees and slippage, and exits are checked against each bar's high/low.
+        self.execution = execution
+        self.stop_loss_pct = stop_loss_pct
+        self.quantity = 0.0
+        self.stop_price = np.nan
+        self.target_price = np.nan
 
         # Define action and observation space
         self.action_space = spaces.Discrete(3)  # 0: Hold, 1: Buy, 2: Sell
@@ -34,32 +100,138 @@ class TradingEnv(gym.Env):
 
         # Validate dataset structure
         required_columns = {"open", "high", "low", "close", "volume"}
-        if not required_columns.issubset(self.df.columns):
+        if self.df is not None and not required_columns.issubset(self.df.columns):
             raise ValueError(f"\u274c ERROR: Dataset is missing required columns! Available columns: {list(self.df.columns)}")
 
+        if self.use_arrays and self.source is None:
+            if self.market is None:
+                self.market = MarketArrays.from_frame(self.df)
+            self._set_prices(self.market)
+
+        # Fixed-length episodes at random or stratified offsets instead of always walking from row 0
+        self.episode_length = episode_length
+        self.episode_start = 0
+        if episode_length is not None or self.source is not None:
+            if episode_length is None:
+                raise ValueError("\u274c ERROR: episode_length is required when serving episodes from a data source")
+            if not self.use_arrays:
+                raise ValueError("\u274c ERROR: episode_length needs array mode (use_arrays=True)")
+            from data_sources import ArraySource, EpisodeSampler
+
+            if self.source is None:
+                self.source = ArraySource(self.market)
+            self.sampler = EpisodeSampler(self.source.segments, episode_length, start_mode, self.source.min_start)
+            self._load_window(self.source.segments[0][0] + self.source.min_start)
+
+        if execution is not None and not self.live_mode:
+            has_ohlc = self.market.has_ohlc if self.use_arrays else {"open", "high", "low"}.issubset(self.df.columns)
+            if not has_ohlc:
+                raise ValueError("\u274c ERROR: Fill simulation needs open/high/low prices in the market data")
+
+        if self.live_mode:
+            from streaming_indicators import IndicatorSet  # Only needed when trading live
+
+            self.indicators = IndicatorSet()
+            self._live_obs = None
+            self._live_price = None
+            self._live_range = None
+            if self.df is not None:
+                self.indicators.warm_up(self.df)  # History primes the indicator state
+
+        # Mark-to-market equity and position after every step, preallocated for the longest episode
+        if self.live_mode:
+            capacity = LIVE_EQUITY_CAPACITY
+        elif self.episode_length is not None:
+            capacity = self.episode_length + 1
+        else:
+            capacity = len(self._close) if self.use_arrays else len(self.df)
+        self.equity = np.empty(capacity, dtype=np.float64)
+        self.positions = np.zeros(capacity, dtype=np.int8)
+        self.n_recorded = 0
+
+    def push_candle(self, candle):
+        """
+        Live mode: feed one closed candle (mapping with OHLCV keys) and return its observation.
+        Indicator state is updated in O(1), giving the same layout as OHLCV + features.FEATURE_SPEC columns.
+        """
+        values = self.indicators.update(candle)
+        ohlcv = [float(candle[column]) for column in ("open", "high", "low", "close", "volume")]
+        self._live_obs = np.array(ohlcv + list(values.values()), dtype=np.float32)
+        self._live_price = ohlcv[3]
+        self._live_range = tuple(ohlcv[:3])
+        return self._live_obs
+
+    def _set_prices(self, market):
+        self.market = market
+        self._obs = market.obs
+        self._close = market.close
+
+    def _load_window(self, start):
+        self._set_prices(self.source.window(start, start + self.episode_length + 1))
+        self.episode_start = int(start)
+
     def reset(self, seed=None, options=None):
         """Reset the environment to its initial state."""
         super().reset(seed=seed)
+        if self.episode_length is not None and not self.live_mode:
+            self._load_window(self.sampler.sample(1, self.np_random)[0])
         self.current_step = 0
         self.balance = self.initial_balance
         self.position = 0
         self.entry_price = 0
+        self.quantity = 0.0
+        self.stop_price = np.nan
+        self.target_price = np.nan
         self.portfolio_value = self.initial_balance
-        return self._next_observation(), {}
+        self.n_recorded = 0
+        self._record()
+        return self._next_observation(), {"episode_start": self.episode_start}
+
+    def _record(self):
+        if self.n_recorded == len(self.equity):  # Only reachable in live mode
+            self.equity = np.concatenate([self.equity, np.empty_like(self.equity)])
+            self.positions = np.concatenate([self.positions, np.zeros_like(self.positions)])
+        self.equity[self.n_recorded] = self.portfolio_value
+        self.positions[self.n_recorded] = self.position
+        self.n_recorded += 1
+
+    def equity_curve(self):
+        """Mark-to-market equity of the current episode, one value per bar since reset."""
+        return self.equity[:self.n_recorded]
+
+    def episode_metrics(self):
+        """Sharpe, Sortino, drawdown, turnover and exposure of the current episode so far."""
+        return compute_metrics(self.equity_curve(), self.positions[:self.n_recorded], self.periods_per_year)
 
     def _next_observation(self):
         """Get the next observation from the data."""
+        if self.live_mode and self._live_obs is not None:
+            return self._live_obs
+        if self.use_arrays:
+            return self._obs[self.current_step]
         obs = self.df.iloc[self.current_step].drop("timestamp").values.astype(np.float32)
         return obs
 
+    @timed("env_step_seconds")
     def step(self, action):
         """Take an action and return the new state, reward, and done flag."""
         self.current_step += 1
-        done = self.current_step >= len(self.df) - 1
-        current_price = self.df.iloc[self.current_step]["close"]
+        if self.live_mode and self._live_price is not None:
+            done = False  # A live session has no fixed end
+            current_price = self._live_price
+        elif self.use_arrays:
+            done = self.current_step >= len(self._close) - 1
+            current_price = self._close[self.current_step]
+        else:
+            done = self.current_step >= len(self.df) - 1
+            current_price = self.df.iloc[self.current_step]["close"]
         reward = 0
 
-        if action == 1:  # Buy
+        if self.execution is not None:
+            reward = self._execute(action, current_price)
+            self.portfolio_value = self.balance + self.quantity * (current_price - self.entry_price) * self.position
+
+        elif action == 1:  # Buy
             if self.position == 0:
                 self.position = 1
                 self.entry_price = current_price
@@ -71,8 +243,57 @@ class TradingEnv(gym.Env):
                 self.balance += profit
                 self.position = 0
 
-        self.portfolio_value = self.balance
-        return self._next_observation(), reward, done, False, {}  # ✅ Fix unpacking issue
+        if self.execution is None:
+            # Open positions are marked to market with the same placeholder P&L as a sale
+            self.portfolio_value = self.balance + (current_price - self.entry_price) * 100 * self.position
+        self._record()
+        info = {"portfolio_value": self.portfolio_value}
+        if done:
+            info["metrics"] = self.episode_metrics()
+        return self._next_observation(), reward, done, False, info  # ✅ Fix unpacking issue
+
+    def _bar_range(self):
+        """(open, high, low) of the current bar."""
+        if self.live_mode and self._live_range is not None:
+            return self._live_range
+        if self.use_arrays:
+            i = self.current_step
+            return self.market.open[i], self.market.high[i], self.market.low[i]
+        row = self.df.iloc[self.current_step]
+        return row["open"], row["high"], row["low"]
+
+    def _execute(self, action, price):
+        """
+        One bar of simulated execution. A resting stop/target is checked against the bar's range first,
+        since it fills intrabar before the close the agent acts on; the agent's market orders fill at the close.
+        Returns the step's realized P&L net of fees.
+        """
+        open_, high, low = self._bar_range()
+        if self.position == 1:
+            exit_price, reason = self.execution.bracket_exit(open_, high, low, self.stop_price, self.target_price, 1)
+            if reason != EXIT_NONE:
+                return self._close_position(float(exit_price), reason)
+            if action == 2:
+                return self._close_position(self.execution.market_fill(price, -1, high, low), EXIT_SIGNAL)
+        elif action == 1:
+            entry, quantity, stop, target, fee = self.execution.open_bracket(
+                price, 1, self.trade_risk, self.stop_loss_pct, self.r_factor, max(self.balance, 0) * self.leverage, high, low)
+            if quantity > 0:
+                self.position = 1
+                self.entry_price, self.quantity = entry, float(quantity)
+                self.stop_price, self.target_price = stop, target
+                self.balance -= fee
+                return -fee
+        return 0
+
+    def _close_position(self, exit_price, reason):
+        fee = self.quantity * exit_price * float(self.execution.exit_fee_rate(reason))
+        profit = self.quantity * (exit_price - self.entry_price) - fee
+        self.balance += profit
+        self.position = 0
+        self.quantity = 0.0
+        self.stop_price = self.target_price = np.nan
+        return profit
 
     def render(self):
         """Render the environment state."""
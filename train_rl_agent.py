@@ -1,27 +1,26 @@
+import argparse
+import json
+import os
 import gymnasium as gym
 import optuna
 import numpy as np
+from contextlib import nullcontext
+from functools import partial
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 from stable_baselines3.common.monitor import Monitor
-from trading_env import TradingEnv
-import pandas as pd
-# Load dataset
-def make_env():
-    """Creates and returns a trading environment with data loaded."""
-    try:
-        df = pd.read_csv("data/BTC-USD.csv")  # Ensure the path is correct
-        print("✅ Data Loaded Successfully:", df.head())  # Debugging output
-    except Exception as e:
-        print(f"❌ ERROR loading dataset: {e}")
-        return None  # Handle failure gracefully
-
-    return TradingEnv(df)
+from data_store import read_candles
+from features import add_features, cache_name
+from shared_market_data import attach_market_arrays, shared_market_arrays
+from trading_env import MarketArrays, TradingEnv
+from vec_trading_env import VecTradingEnv
 
-env = make_env()
+DATASET = ("kraken", "BTC/USD", "5m")  # (exchange, pair, timeframe) in the data store
+STORE_DATASETS = [DATASET]  # Every store dataset a --source store run samples episodes from
+N_ENVS = 8  # Parallel episodes stepped together by VecTradingEnv
+EVAL_FRACTION = 0.2  # Most recent share of every dataset held out of training for evaluation and tuning
 
-if env is None:
-    raise RuntimeError("Failed to create environment due to data loading error.")
+BEST_PARAMS_PATH = "best_params.json"  # Written by tune_rl_agent.py; overrides BEST_PARAMS when present
 
 # Use best hyperparameters found by Optuna
 BEST_PARAMS = {
@@ -34,26 +33,130 @@ BEST_PARAMS = {
     "vf_coef": 0.7631628101446997,
 }
 
-# Create environment
-env = make_env()
-
-# Initialize model with best parameters
-model = PPO(
-    "MlpPolicy",
-    env,
-    learning_rate=BEST_PARAMS["learning_rate"],
-    gamma=BEST_PARAMS["gamma"],
-    gae_lambda=BEST_PARAMS["gae_lambda"],
-    batch_size=BEST_PARAMS["batch_size"],
-    n_steps=BEST_PARAMS["n_steps"],
-    ent_coef=BEST_PARAMS["ent_coef"],
-    vf_coef=BEST_PARAMS["vf_coef"],
-    verbose=1
-)
-
-# Train model
-model.learn(total_timesteps=500_000)
-
-# Save trained model
-model.save("optimized_trading_agent")
-print("✅ Training complete! Model saved as optimized_trading_agent.zip")
+
+# Load dataset
+def load_data():
+    """Read the training dataset once; every env shares the arrays built from it."""
+    try:
+        df = read_candles(*DATASET)  # Populate with data_pipeline.py or data_store.py
+        df = add_features(df, name=cache_name(DATASET))  # OHLCV + cached indicators = 11 observation columns
+        print("✅ Data Loaded Successfully:", df.head())  # Debugging output
+    except Exception as e:
+        print(f"❌ ERROR loading dataset: {e}")
+        return None  # Handle failure gracefully
+    return df
+
+
+def split_index(n_rows, eval_fraction=EVAL_FRACTION):
+    """First row of the held-out evaluation tail; training never sees rows from here on."""
+    return int(n_rows * (1 - eval_fraction))
+
+
+def split_market(market, eval_fraction=EVAL_FRACTION):
+    """(train, eval) views of a MarketArrays, split at split_index."""
+    split = split_index(len(market), eval_fraction)
+    return market.rows(0, split), market.rows(split, len(market))
+
+
+def make_worker_env(market_dir, episode_length=None, start_mode="random"):
+    """Runs inside a SubprocVecEnv worker: attach to the published arrays read-only."""
+    return TradingEnv(attach_market_arrays(market_dir), episode_length=episode_length, start_mode=start_mode)
+
+
+def make_store_worker_env(datasets, episode_length, start_mode="random"):
+    """Runs inside a SubprocVecEnv worker: memory-map the store and build each episode's window on demand."""
+    from data_sources import StoreSource
+
+    return TradingEnv(StoreSource(datasets, holdout=EVAL_FRACTION), episode_length=episode_length, start_mode=start_mode)
+
+
+def make_env(market, n_envs=N_ENVS, vec_env="native", market_dir=None, episode_length=None, start_mode="random"):
+    """
+    Creates the training environment.
+    "native" steps all episodes in one VecTradingEnv; "subproc" runs one TradingEnv
+    per worker process, each memory-mapping the arrays published in market_dir.
+    """
+    if vec_env == "subproc":
+        return SubprocVecEnv([partial(make_worker_env, market_dir, episode_length, start_mode) for _ in range(n_envs)])
+    return VecTradingEnv(market, n_envs=n_envs, episode_length=episode_length, start_mode=start_mode)
+
+
+def load_best_params(path=BEST_PARAMS_PATH):
+    """The latest tuned hyperparameters from tune_rl_agent.py, falling back to BEST_PARAMS."""
+    params = dict(BEST_PARAMS)
+    if os.path.exists(path):
+        with open(path) as f:
+            params.update(json.load(f))
+        print(f"✅ Using tuned hyperparameters from {path}")
+    return params
+
+
+def train(env, total_timesteps):
+    """Initialize PPO with the best parameters and train it on env."""
+    params = load_best_params()
+    model = PPO(
+        "MlpPolicy",
+        env,
+        learning_rate=params["learning_rate"],
+        gamma=params["gamma"],
+        gae_lambda=params["gae_lambda"],
+        batch_size=params["batch_size"],
+        n_steps=params["n_steps"],
+        ent_coef=params["ent_coef"],
+        vf_coef=params["vf_coef"],
+        verbose=1
+    )
+    model.learn(total_timesteps=total_timesteps)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the PPO trading agent.")
+    parser.add_argument("--n-envs", type=int, default=N_ENVS, help="Number of parallel environments")
+    parser.add_argument("--vec-env", choices=["native", "subproc"], default="native",
+                        help="native: one batched VecTradingEnv; subproc: one worker process per env")
+    parser.add_argument("--timesteps", type=int, default=500_000, help="Total PPO timesteps")
+    parser.add_argument("--episode-length", type=int, default=None, help="Bars per episode (default: whole history)")
+    parser.add_argument("--start-mode", choices=["random", "stratified"], default="random",
+                        help="How episode start offsets are drawn when --episode-length is set")
+    parser.add_argument("--source", choices=["arrays", "store"], default="arrays",
+                        help="store: subproc workers read episode windows lazily from STORE_DATASETS "
+                             "(needs --episode-length and --vec-env subproc)")
+    args = parser.parse_args()
+
+    if args.source == "store":
+        if args.episode_length is None:
+            parser.error("--source store needs --episode-length")
+        if args.vec_env != "subproc":
+            parser.error("--source store runs one worker process per env; pass --vec-env subproc")
+        # Workers memory-map the store themselves; nothing is loaded or published here
+        publish = nullcontext()
+        build_env = lambda market_dir: SubprocVecEnv(
+            [partial(make_store_worker_env, STORE_DATASETS, args.episode_length, args.start_mode) for _ in range(args.n_envs)]
+        )
+    else:
+        df = load_data()
+        if df is None:
+            raise RuntimeError("Failed to create environment due to data loading error.")
+        market, _ = split_market(MarketArrays.from_frame(df))  # The tail is evaluate_rl_agent.py's hold-out
+        del df  # Workers only need the arrays
+
+        # Subproc workers attach to one memory-mapped copy of the data
+        publish = shared_market_arrays(market) if args.vec_env == "subproc" else nullcontext()
+        build_env = lambda market_dir: make_env(market, args.n_envs, args.vec_env, market_dir, args.episode_length, args.start_mode)
+
+    # Create environment
+    with publish as market_dir:
+        env = build_env(market_dir)
+        try:
+            model = train(env, args.timesteps)
+        finally:
+            env.close()
+
+    # Save trained model
+    model.save("optimized_trading_agent")
+    print("✅ Training complete! Model saved as optimized_trading_agent.zip")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+
+import optuna
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.evaluation import evaluate_policy
+
+from train_rl_agent import BEST_PARAMS, BEST_PARAMS_PATH, N_ENVS, load_data, split_market
+from trading_env import MarketArrays
+from vec_trading_env import VecTradingEnv
+
+STORAGE = "sqlite:///optuna.db"
+STUDY_NAME = "ppo_trading"
+BEST_MODEL_PATH = os.path.join("checkpoints", "optuna_best_model")
+TRIAL_MODEL_DIR = os.path.join("checkpoints", "optuna_trials")  # Every completed trial's model, by study and number
+VALIDATION_FRACTION = 0.2  # Share of the training range trials are scored on; the evaluation tail stays unseen
+TRIAL_TIMESTEPS = 100_000  # Per trial; a fraction of a full training run
+TRIAL_EPISODE_LENGTH = 2_048  # Trials train on random windows of this many bars instead of the whole history
+EVAL_EPISODES = 8
+EVAL_EPISODE_LENGTH = 2_048
+EVAL_FREQ = 10_000  # Timesteps between intermediate evaluations reported to the pruner
+EVAL_SEED = 0  # Every trial is scored on the same evaluation windows
+
+
+def sample_params(trial):
+    """Search space around the PPO arguments train_rl_agent.py consumes."""
+    return {
+        "learning_rate": trial.suggest_float("learning_rate", 1e-5, 1e-3, log=True),
+        "gamma": trial.suggest_float("gamma", 0.9, 0.9999),
+        "gae_lambda": trial.suggest_float("gae_lambda", 0.8, 0.99),
+        "batch_size": trial.suggest_categorical("batch_size", [64, 128, 256, 512]),
+        "n_steps": trial.suggest_categorical("n_steps", [256, 512, 1024, 2048]),
+        "ent_coef": trial.suggest_float("ent_coef", 1e-4, 0.1, log=True),
+        "vf_coef": trial.suggest_float("vf_coef", 0.2, 1.0),
+    }
+
+
+def make_storage(journal=None):
+    """The shared SQLite study by default; a journal file copes better with many concurrent writers."""
+    if journal is None:
+        # Wait on SQLite's write lock instead of failing when workers finish trials at the same moment
+        return optuna.storages.RDBStorage(STORAGE, engine_kwargs={"connect_args": {"timeout": 60}})
+    try:
+        from optuna.storages.journal import JournalFileBackend
+    except ImportError:  # optuna < 4
+        from optuna.storages import JournalFileStorage as JournalFileBackend
+    return optuna.storages.JournalStorage(JournalFileBackend(journal))
+
+
+def make_pruner(name, max_timesteps):
+    if name == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=EVAL_FREQ, max_resource=max_timesteps, reduction_factor=3)
+    if name == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2 * EVAL_FREQ)
+    return optuna.pruners.NopPruner()
+
+
+def evaluate(model, eval_env):
+    eval_env.seed(EVAL_SEED)
+    mean_reward, _ = evaluate_policy(model, eval_env, n_eval_episodes=EVAL_EPISODES, deterministic=True)
+    return float(mean_reward)
+
+
+class TrialEvalCallback(BaseCallback):
+    """Reports the held-out mean reward to the trial every eval_freq steps and stops learn() when pruned."""
+
+    def __init__(self, trial, eval_env, eval_freq=EVAL_FREQ):
+        super().__init__()
+        self.trial = trial
+        self.eval_env = eval_env
+        self.eval_freq = eval_freq
+        self.next_eval = eval_freq
+        self.pruned = False
+
+    def _on_step(self):
+        if self.num_timesteps < self.next_eval:
+            return True
+        self.next_eval += self.eval_freq
+        self.trial.report(evaluate(self.model, self.eval_env), self.num_timesteps)
+        self.pruned = self.trial.should_prune()
+        return not self.pruned
+
+
+def trial_model_path(study_name, number):
+    return os.path.join(TRIAL_MODEL_DIR, f"{study_name}_trial{number}.zip")
+
+
+def objective(trial, train_market, validation_market, timesteps, n_envs):
+    params = sample_params(trial)
+    train_env = VecTradingEnv(train_market, n_envs=n_envs, episode_length=TRIAL_EPISODE_LENGTH, seed=trial.number)
+    eval_env = VecTradingEnv(validation_market, n_envs=EVAL_EPISODES, episode_length=EVAL_EPISODE_LENGTH)
+    model = PPO("MlpPolicy", train_env, device="cpu", seed=trial.number, verbose=0, **params)
+
+    callback = TrialEvalCallback(trial, eval_env)
+    model.learn(total_timesteps=timesteps, callback=callback)
+    if callback.pruned:
+        raise optuna.TrialPruned()
+
+    # Every trial keeps its own model; comparing against best_value here would race between workers
+    path = trial_model_path(trial.study.study_name, trial.number)
+    os.makedirs(TRIAL_MODEL_DIR, exist_ok=True)
+    model.save(path[:-4] + ".tmp.zip")
+    os.replace(path[:-4] + ".tmp.zip", path)
+    return evaluate(model, eval_env)
+
+
+def run_worker(storage, study_name, n_trials, timesteps, n_envs, pruner):
+    """One worker process: load the shared study and pull trials from it until its budget is spent."""
+    import torch
+    torch.set_num_threads(1)  # Parallelism comes from the worker processes
+
+    # Trials are scored on a validation slice at the end of the training range, never on the
+    # evaluation tail evaluate_rl_agent.py reports
+    train_market, _ = split_market(MarketArrays.from_frame(load_data()))
+    train_market, validation_market = split_market(train_market, VALIDATION_FRACTION)
+    study = optuna.load_study(study_name=study_name, storage=make_storage(storage), pruner=make_pruner(pruner, timesteps))
+    study.optimize(lambda trial: objective(trial, train_market, validation_market, timesteps, n_envs), n_trials=n_trials)
+
+
+def best_trial(study):
+    if not study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)):
+        raise ValueError(f"❌ ERROR: No trial of study '{study.study_name}' completed; nothing to write")
+    return study.best_trial
+
+
+def write_best_params(study, path=BEST_PARAMS_PATH):
+    trial = best_trial(study)
+    with open(path, "w") as f:
+        json.dump(trial.params, f, indent=2)
+    print(f"✅ Best trial #{trial.number} (reward {trial.value:.2f}) params written to {path}")
+
+
+def publish_best_model(study, path=BEST_MODEL_PATH):
+    """Copy the best trial's model to path, so it always matches the params in best_params.json."""
+    trial = best_trial(study)
+    source = trial_model_path(study.study_name, trial.number)
+    if not os.path.exists(source):
+        print(f"⚠️ No saved model for trial #{trial.number} ({source}); {path}.zip left unchanged")
+        return
+    shutil.copyfile(source, f"{path}.tmp.zip")
+    os.replace(f"{path}.tmp.zip", f"{path}.zip")
+    print(f"✅ Best trial #{trial.number} model copied to {path}.zip")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel Optuna search over PPO hyperparameters.")
+    parser.add_argument("--trials", type=int, default=50, help="Total trials across all workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--timesteps", type=int, default=TRIAL_TIMESTEPS, help="Training timesteps per trial")
+    parser.add_argument("--n-envs", type=int, default=N_ENVS)
+    parser.add_argument("--pruner", choices=["median", "hyperband", "none"], default="median")
+    parser.add_argument("--journal", default=None, help="Use a journal file instead of optuna.db")
+    parser.add_argument("--study-name", default=STUDY_NAME)
+    args = parser.parse_args()
+
+    # Resuming an existing study warm-starts the sampler with its trials; a new one starts from BEST_PARAMS
+    study = optuna.create_study(
+        study_name=args.study_name, storage=make_storage(args.journal), direction="maximize", load_if_exists=True
+    )
+    if not study.trials:
+        study.enqueue_trial(BEST_PARAMS)
+
+    workers = max(1, min(args.workers, args.trials))
+    budgets = [args.trials // workers + (i < args.trials % workers) for i in range(workers)]
+    print(f"🚀 Study '{args.study_name}': {args.trials} trials on {workers} workers ({len(study.trials)} existing trials)")
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.journal, args.study_name, n, args.timesteps, args.n_envs, args.pruner))
+        for n in budgets
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    study = optuna.load_study(study_name=args.study_name, storage=make_storage(args.journal))
+    states = [trial.state.name for trial in study.trials]
+    print(f"📊 {states.count('COMPLETE')} complete, {states.count('PRUNED')} pruned, {states.count('FAIL')} failed")
+    write_best_params(study)
+    publish_best_model(study)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from data_sources import EpisodeSampler
+from execution import EXIT_NONE, EXIT_SIGNAL
+from instrumentation import timed
+from metrics import compute_metrics, periods_per_year
+from trading_env import MarketArrays
+
+HISTORY_CAPACITY = 4096  # Initial bars of equity history per env for whole-history episodes, doubled when full
+
+
+class VecTradingEnv(VecEnv):
+    """
+    N independent TradingEnv episodes stepped together with NumPy.
+    Cursors, balances, positions and entry prices are arrays, so one step() call
+    advances every episode in a single vectorized update over the shared price data.
+    With an execution.ExecutionModel, fills follow TradingEnv(execution=...) exactly: bracket orders
+    sized to lose trade_risk at the stop, fees and slippage, and stops/targets checked against bar ranges.
+    """
+
+    # Attributes that hold one value per episode; get_attr/set_attr index into these.
+    PER_ENV_ATTRS = ("current_step", "episode_start", "episode_end", "balance", "position", "entry_price", "portfolio_value",
+                     "quantity", "stop_price", "target_price")
+
+    def __init__(self, df, n_envs=8, initial_balance=100, leverage=5, random_start=True, episode_length=None, seed=None,
+                 timeframe="5m", start_mode="random", execution=None, stop_loss_pct=0.01):
+        if isinstance(df, MarketArrays):
+            self.market = df
+        else:
+            required_columns = {"open", "high", "low", "close", "volume"}
+            if not required_columns.issubset(df.columns):
+                raise ValueError(f"❌ ERROR: Dataset is missing required columns! Available columns: {list(df.columns)}")
+            self.market = MarketArrays.from_frame(df)
+
+        self._obs = self.market.obs
+        self._close = self.market.close
+        self.n_rows = len(self.market)
+        if episode_length is not None and not 1 <= episode_length < self.n_rows:
+            raise ValueError(f"❌ ERROR: episode_length must be between 1 and {self.n_rows - 1}, got {episode_length}")
+
+        self.initial_balance = initial_balance
+        self.leverage = leverage
+        self.r_factor = 2  # Same bracket settings as TradingEnv
+        self.trade_risk = 1
+        self.execution = execution
+        self.stop_loss_pct = stop_loss_pct
+        if execution is not None and not self.market.has_ohlc:
+            raise ValueError("❌ ERROR: Fill simulation needs open/high/low prices in the market data")
+        self.random_start = random_start
+        self.episode_length = episode_length
+        self.render_mode = None
+        self.rng = np.random.default_rng(seed)
+        self.periods_per_year = periods_per_year(timeframe)
+        # Fixed-length episodes draw their starts at random or stratified across the history
+        self.sampler = EpisodeSampler([(0, self.n_rows)], episode_length, start_mode) if episode_length is not None else None
+
+        self.current_step = np.zeros(n_envs, dtype=np.int64)
+        self.episode_start = np.zeros(n_envs, dtype=np.int64)
+        self.episode_end = np.full(n_envs, self.n_rows - 1, dtype=np.int64)
+        self.balance = np.full(n_envs, initial_balance, dtype=np.float64)
+        self.position = np.zeros(n_envs, dtype=np.int8)  # 1 for long, 0 for no position
+        self.entry_price = np.zeros(n_envs, dtype=np.float64)
+        self.portfolio_value = np.full(n_envs, initial_balance, dtype=np.float64)
+        self.quantity = np.zeros(n_envs, dtype=np.float64)
+        self.stop_price = np.full(n_envs, np.nan)
+        self.target_price = np.full(n_envs, np.nan)
+        self._actions = np.zeros(n_envs, dtype=np.int64)
+        self._env_index = np.arange(n_envs)
+        # Fixed-length episodes know their size; whole-history ones grow on demand instead of n_rows × n_envs upfront
+        self._allocate_history(episode_length + 1 if episode_length is not None else min(HISTORY_CAPACITY, self.n_rows))
+
+        # Same bounds as TradingEnv, sized from the data so it always matches the observation layout
+        observation_space = spaces.Box(low=-5, high=5, shape=(self._obs.shape[1],), dtype=np.float32)
+        super().__init__(n_envs, observation_space, spaces.Discrete(3))
+
+    def _allocate_history(self, n_bars):
+        """Preallocate per-bar mark-to-market equity and positions (bars since episode start × envs)."""
+        self.equity = np.empty((n_bars, len(self.balance)), dtype=np.float64)
+        self.positions = np.zeros(self.equity.shape, dtype=np.int8)
+
+    def _grow_history(self, n_bars):
+        """Double the history until it holds n_bars (never past the longest possible episode), keeping what is recorded."""
+        capacity = len(self.equity)
+        while capacity < n_bars:
+            capacity *= 2
+        capacity = min(capacity, self.n_rows)
+        equity, positions = self.equity, self.positions
+        self._allocate_history(capacity)
+        self.equity[:len(equity)] = equity
+        self.positions[:len(positions)] = positions
+
+    def _record(self, envs):
+        rows = self.current_step[envs] - self.episode_start[envs]
+        if len(rows) and rows.max() >= len(self.equity):  # Only reachable without episode_length
+            self._grow_history(int(rows.max()) + 1)
+        self.equity[rows, envs] = self.portfolio_value[envs]
+        self.positions[rows, envs] = self.position[envs]
+
+    def equity_curve(self, i):
+        """Mark-to-market equity of env i's current episode, one value per bar since its start."""
+        return self.equity[:self.current_step[i] - self.episode_start[i] + 1, i]
+
+    def episode_metrics(self, i):
+        """Sharpe, Sortino, drawdown, turnover and exposure of env i's current episode so far."""
+        n = self.current_step[i] - self.episode_start[i] + 1
+        return compute_metrics(self.equity[:n, i], self.positions[:n, i], self.periods_per_year)
+
+    def _reset_envs(self, mask):
+        """Start new episodes for the envs selected by the boolean mask."""
+        n = int(mask.sum())
+        if n == 0:
+            return
+        span = self.episode_length if self.episode_length is not None else 0
+        max_start = self.n_rows - 1 - span
+        if self.random_start and self.sampler is not None:
+            starts = self.sampler.sample(n, self.rng)
+        elif self.random_start and max_start > 0:
+            starts = self.rng.integers(0, max_start, size=n)
+        else:
+            starts = np.zeros(n, dtype=np.int64)
+
+        self.current_step[mask] = starts
+        self.episode_start[mask] = starts
+        self.episode_end[mask] = starts + span if span else self.n_rows - 1
+        self.balance[mask] = self.initial_balance
+        self.position[mask] = 0
+        self.entry_price[mask] = 0
+        self.quantity[mask] = 0.0
+        self.stop_price[mask] = np.nan
+        self.target_price[mask] = np.nan
+        self.portfolio_value[mask] = self.initial_balance
+        self._record(self._env_index[mask])
+
+    def reset(self):
+        """Reset every episode and return the stacked first observations."""
+        for seed in self._seeds:
+            if seed is not None:
+                self.rng = np.random.default_rng(seed)
+                break
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs[self.current_step]
+
+    def reset_windows(self, starts, episode_length):
+        """Reset every episode onto a fixed window [start, start + episode_length], e.g. for evaluation."""
+        starts = np.asarray(starts, dtype=np.int64)
+        if len(starts) != self.num_envs or starts.min() < 0 or starts.max() + episode_length > self.n_rows - 1:
+            raise ValueError(f"❌ ERROR: Need {self.num_envs} window starts within the first {self.n_rows - 1 - episode_length} rows")
+        if episode_length + 1 > len(self.equity):
+            self._allocate_history(episode_length + 1)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        self.current_step[:] = starts
+        self.episode_start[:] = starts
+        self.episode_end[:] = starts + episode_length
+        return self._obs[self.current_step]
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    @timed("vec_env_step_seconds")
+    def step_wait(self):
+        """Advance all episodes one bar; finished episodes are reset in place (SB3 auto-reset)."""
+        self.current_step += 1
+        price = self._close[self.current_step]
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+
+        if self.execution is not None:
+            rewards[:] = self._execute(price)
+            self.portfolio_value[:] = self.balance + self.quantity * (price - self.entry_price) * self.position
+        else:
+            buys = (self._actions == 1) & (self.position == 0)
+            self.position[buys] = 1
+            self.entry_price[buys] = price[buys]
+
+            sells = (self._actions == 2) & (self.position == 1)
+            profit = (price[sells] - self.entry_price[sells]) * 100  # Placeholder calculation, same as TradingEnv
+            rewards[sells] = profit
+            self.balance[sells] += profit
+            self.position[sells] = 0
+
+            # Mark open positions to market with the same placeholder P&L as a sale
+            self.portfolio_value[:] = self.balance + (price - self.entry_price) * 100 * self.position
+        self._record(self._env_index)
+        dones = self.current_step >= self.episode_end
+        obs = self._obs[self.current_step]
+        infos = [{} for _ in range(self.num_envs)]
+
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+                infos[i]["episode"] = {
+                    "r": float(self.balance[i] - self.initial_balance),
+                    "l": int(self.current_step[i] - self.episode_start[i]),
+                    "t": 0.0,
+                }
+                infos[i]["metrics"] = self.episode_metrics(i)
+            self._reset_envs(dones)
+            obs[dones] = self._obs[self.current_step[dones]]
+
+        return obs, rewards, dones, infos
+
+    def _execute(self, price):
+        """
+        TradingEnv._execute for every env at once: open positions first check their stop/target against
+        this bar's range, then the agent's sells and buys fill at the close. Returns each env's realized
+        P&L net of fees.
+        """
+        step = self.current_step
+        open_, high, low = self.market.open[step], self.market.high[step], self.market.low[step]
+        held = self.position == 1
+        profit = np.zeros(self.num_envs)
+
+        bracket_price, reason = self.execution.bracket_exit(open_, high, low, self.stop_price, self.target_price, 1)
+        touched = held & (reason != EXIT_NONE)  # Flat envs have NaN levels, which never trigger
+        closing = touched | (held & (self._actions == 2))
+        if closing.any():
+            exit_price = np.where(touched, bracket_price, self.execution.market_fill(price, -1, high, low))[closing]
+            exit_reason = np.where(touched, reason, EXIT_SIGNAL)[closing]
+            quantity = self.quantity[closing]
+            fee = quantity * exit_price * self.execution.exit_fee_rate(exit_reason)
+            profit[closing] = quantity * (exit_price - self.entry_price[closing]) - fee
+            self.balance[closing] += profit[closing]
+            self.position[closing] = 0
+            self.quantity[closing] = 0.0
+            self.stop_price[closing] = self.target_price[closing] = np.nan
+
+        opening = ~held & (self._actions == 1)
+        if opening.any():
+            entry, quantity, stop, target, fee = self.execution.open_bracket(
+                price[opening], 1, self.trade_risk, self.stop_loss_pct, self.r_factor,
+                np.maximum(self.balance[opening], 0) * self.leverage, high[opening], low[opening])
+            filled = quantity > 0
+            envs = np.flatnonzero(opening)[filled]
+            self.position[envs] = 1
+            self.entry_price[envs], self.quantity[envs] = entry[filled], quantity[filled]
+            self.stop_price[envs], self.target_price[envs] = stop[filled], target[filled]
+            self.balance[envs] -= fee[filled]
+            profit[envs] = -fee[filled]
+        return profit
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        if attr_name in self.PER_ENV_ATTRS:
+            return [value[i] for i in self._indices(indices)]
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        if attr_name in self.PER_ENV_ATTRS:
+            getattr(self, attr_name)[list(self._indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from evaluate_checkpoints import run_windows
+from shared_market_data import attach_market_arrays, shared_market_arrays
+from train_rl_agent import DATASET, N_ENVS, load_best_params, load_data
+from trading_env import MarketArrays
+
+CACHE_DIR = "walk_forward"
+N_FOLDS = 6
+TEST_PERIOD = "30D"  # Out-of-sample window per fold; folds sit on a fixed calendar grid of this size
+MIN_TRAIN_BARS = 8_640  # A fold needs at least 30 days of 5m bars to train on
+FOLD_TIMESTEPS = 200_000
+SEED = 0
+
+
+def make_folds(timestamps, n_folds=N_FOLDS, test_period=TEST_PERIOD, train_period=None, min_train_bars=MIN_TRAIN_BARS):
+    """
+    The latest n_folds train/test splits by time. Test windows are consecutive test_period blocks on a
+    grid anchored at the Unix epoch, so appending data never moves an existing fold's boundaries; it only
+    extends the newest test window or adds a new fold. Training uses every earlier bar (anchored) or,
+    with train_period, only that much history before the test window (rolling).
+    Returns dicts of row ranges [lo, hi) into the arrays plus the test window's start/end times.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    step = pd.Timedelta(test_period)
+    edges = pd.date_range(timestamps[0].floor(test_period), timestamps[-1] + step, freq=step)
+    rows = timestamps.searchsorted(edges)
+
+    folds = []
+    for start, end, lo, hi in zip(edges[:-1], edges[1:], rows[:-1], rows[1:]):
+        train_lo = 0 if train_period is None else int(timestamps.searchsorted(start - pd.Timedelta(train_period)))
+        if hi - lo < 3 or lo - train_lo < min_train_bars:  # Metrics need a few test bars
+            continue
+        folds.append({
+            "fold": start.strftime("%Y-%m-%d"),
+            "train": (train_lo, int(lo)),
+            "test": (int(lo), int(hi)),
+            "test_start": start.isoformat(),
+            "test_end": min(end, timestamps[-1]).isoformat(),
+        })
+    return folds[-n_folds:]
+
+
+def fingerprint(market, lo, hi):
+    """Hash of rows [lo, hi): changes when the data or its features change, not when rows are appended elsewhere."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(market.obs[lo:hi]).tobytes())
+    digest.update(np.ascontiguousarray(market.close[lo:hi]).tobytes())
+    return digest.hexdigest()
+
+
+def fold_keys(market, fold, params, timesteps, episode_length):
+    """(train key, eval key): the model is reused while its training data and settings are unchanged."""
+    train_key = hashlib.sha1(json.dumps(
+        {"data": fingerprint(market, *fold["train"]), "params": params, "timesteps": timesteps,
+         "episode_length": episode_length, "seed": SEED}, sort_keys=True
+    ).encode()).hexdigest()[:16]
+    eval_key = hashlib.sha1(f"{train_key}:{fingerprint(market, *fold['test'])}".encode()).hexdigest()[:16]
+    return train_key, eval_key
+
+
+def run_fold(market_dir, fold, params, timesteps, episode_length, cache_dir=CACHE_DIR):
+    """
+    Worker: train the fold's model unless cached, then score it on the fold's out-of-sample window
+    unless that result is cached too. Returns the fold's metrics row.
+    """
+    import torch
+    from stable_baselines3 import PPO
+
+    from policy_export import load_policy
+    from vec_trading_env import VecTradingEnv
+
+    torch.set_num_threads(1)  # Parallelism comes from the pool
+    market = attach_market_arrays(market_dir)
+    train_key, eval_key = fold_keys(market, fold, params, timesteps, episode_length)
+    model_path = os.path.join(cache_dir, "models", f"{train_key}.zip")
+    result_path = os.path.join(cache_dir, "results", f"{eval_key}.json")
+    if os.path.exists(result_path):
+        with open(result_path) as f:
+            return {**json.load(f), "cached": "model+result"}
+
+    started = time.perf_counter()
+    cached = os.path.exists(model_path)
+    if not cached:
+        env = VecTradingEnv(market.rows(*fold["train"]), n_envs=N_ENVS, episode_length=episode_length, seed=SEED)
+        model = PPO("MlpPolicy", env, verbose=0, seed=SEED, **params)
+        model.learn(total_timesteps=timesteps)
+        tmp_path = os.path.join(cache_dir, "models", f"{train_key}.tmp.zip")
+        model.save(tmp_path)
+        os.replace(tmp_path, model_path)  # Never leave a half-written model under a valid key
+    train_seconds = time.perf_counter() - started
+
+    test = market.rows(*fold["test"])
+    length = len(test) - 1
+    env = VecTradingEnv(test, n_envs=1, timeframe=DATASET[2])
+    metrics = run_windows(load_policy(model_path), env, [0], length)
+    row = {
+        "fold": fold["fold"], "test_start": fold["test_start"], "test_end": fold["test_end"],
+        "train_bars": fold["train"][1] - fold["train"][0], "test_bars": length + 1,
+        **{name: values[0].item() for name, values in metrics.items()},
+        "train_seconds": train_seconds, "model": model_path,
+    }
+    tmp_path = result_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(row, f, indent=2)
+    os.replace(tmp_path, result_path)
+    return {**row, "cached": "model" if cached else ""}
+
+
+def summarize(results):
+    """Out-of-sample metrics across folds; returns compound, so they chain like one continuous test."""
+    total_return = np.prod(1 + results["total_return"]) - 1
+    return {
+        "folds": len(results),
+        "oos_total_return": float(total_return),
+        "mean_sharpe": float(results["sharpe"].mean()),
+        "std_sharpe": float(results["sharpe"].std(ddof=0)),
+        "mean_sortino": float(results["sortino"].mean()),
+        "worst_drawdown": float(results["max_drawdown"].max()),
+        "profitable_folds": float((results["total_return"] > 0).mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward training and out-of-sample evaluation over time folds.")
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--test-period", default=TEST_PERIOD, help="Test window per fold, e.g. 30D or 7D")
+    parser.add_argument("--train-period", default=None, help="Rolling training window (default: anchored, all earlier data)")
+    parser.add_argument("--timesteps", type=int, default=FOLD_TIMESTEPS, help="PPO timesteps per fold")
+    parser.add_argument("--episode-length", type=int, default=None, help="Bars per training episode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    df = load_data()
+    if df is None:
+        raise RuntimeError("Failed to load the walk-forward dataset.")
+    folds = make_folds(df["timestamp"], args.folds, args.test_period, args.train_period)
+    if not folds:
+        raise ValueError(f"❌ ERROR: Not enough history for a {args.test_period} test window after {MIN_TRAIN_BARS} training bars")
+    market = MarketArrays.from_frame(df)
+    del df
+    params = load_best_params()
+    for directory in ("models", "results"):
+        os.makedirs(os.path.join(args.cache_dir, directory), exist_ok=True)
+
+    print(f"🚀 {len(folds)} folds of {args.test_period} ({folds[0]['fold']} → {folds[-1]['test_end'][:10]}), "
+          f"{'rolling ' + args.train_period if args.train_period else 'anchored'} training")
+    started = time.perf_counter()
+    with shared_market_arrays(market) as market_dir, ProcessPoolExecutor(min(args.workers, len(folds))) as pool:
+        futures = [pool.submit(run_fold, market_dir, fold, params, args.timesteps, args.episode_length, args.cache_dir)
+                   for fold in folds]
+        rows = [future.result() for future in futures]
+    print(f"✅ Walk-forward done in {time.perf_counter() - started:.1f}s "
+          f"({sum(not row['cached'] for row in rows)} folds trained)\n")
+
+    results = pd.DataFrame(rows).set_index("fold")
+    columns = ["test_bars", "total_return", "sharpe", "sortino", "max_drawdown", "exposure", "trades", "cached"]
+    print(results[columns].to_string(float_format=lambda x: f"{x:,.3f}"))
+    summary = summarize(results)
+    print("\n📊 " + " | ".join(f"{name}: {value:,.3f}" for name, value in summary.items()))
+    results.to_csv(os.path.join(args.cache_dir, "folds.csv"))
+    with open(os.path.join(args.cache_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import inspect
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+import websockets
+
+WS_URL = "wss://openapi.blofin.com/ws/public"
+PING_INTERVAL = 25  # Seconds; BloFin drops public connections that stay silent for 30s
+MAX_BACKOFF = 30  # Seconds between reconnect attempts at most
+
+
+class CandleRingBuffer:
+    """Fixed-capacity buffer of the most recent bars for one symbol, including the still-forming one."""
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((capacity, 5), dtype=np.float64)
+        self.count = 0
+        self.closed_through = None  # Timestamp of the newest confirmed bar
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_timestamp(self):
+        return int(self.timestamps[(self.count - 1) % self.capacity]) if self.count else None
+
+    def upsert(self, row):
+        """
+        Apply one BloFin candle row [ts, o, h, l, c, vol, ..., confirm].
+        Updates the forming bar in place or appends a new one; returns True when a bar closed.
+        """
+        ts = int(row[0])
+        last = self.last_timestamp
+        if last is not None and ts < last:
+            return False  # Stale update for a bar we already moved past
+        if last is None or ts > last:
+            closed = last is not None and (self.closed_through is None or last > self.closed_through)
+            if closed:
+                self.closed_through = last  # A newer bar started, so the previous one is final
+            self.count += 1
+        else:
+            closed = False
+        slot = (self.count - 1) % self.capacity
+        self.timestamps[slot] = ts
+        self.ohlcv[slot] = [float(value) for value in row[1:6]]
+
+        if len(row) > 8 and str(row[8]) == "1" and (self.closed_through is None or ts > self.closed_through):
+            self.closed_through = ts
+            closed = True
+        return closed
+
+    def to_frame(self, closed_only=False):
+        """Bars oldest-first as a DataFrame with the same columns as main.parse_candles."""
+        n = len(self)
+        order = (np.arange(self.count - n, self.count)) % self.capacity
+        df = pd.DataFrame(self.ohlcv[order], columns=["open", "high", "low", "close", "volume"])
+        df.insert(0, "timestamp", pd.to_datetime(self.timestamps[order], unit="ms"))
+        if closed_only:
+            through = self.closed_through if self.closed_through is not None else -1
+            df = df[self.timestamps[order] <= through].reset_index(drop=True)
+        return df
+
+
+class CandleStream:
+    """
+    Subscribes to BloFin candle push feeds and keeps a ring buffer per symbol.
+    on_bar_close(symbol, buffer) runs as soon as a bar is confirmed. After every (re)connect the
+    symbols are backfilled through the REST `backfill(symbol)` coroutine, which returns raw candle
+    rows in the same format as the push feed, so bars missed while disconnected are not lost.
+    """
+
+    def __init__(self, symbols, on_bar_close, backfill, timeframe="5m", ws_url=WS_URL, capacity=500):
+        self.symbols = list(symbols)
+        self.on_bar_close = on_bar_close
+        self.backfill = backfill
+        self.timeframe = timeframe
+        self.ws_url = ws_url
+        self.buffers = {symbol: CandleRingBuffer(capacity) for symbol in self.symbols}
+        self.reconnects = 0
+
+    async def _notify(self, symbol):
+        # A failing symbol is logged, not raised: it would end the stream for every symbol
+        try:
+            result = self.on_bar_close(symbol, self.buffers[symbol])
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logging.error(f"Bar close handler failed for {symbol}: {e!r}")
+
+    async def _apply_rows(self, symbol, rows):
+        """Apply rows oldest-first and fire one close notification if any bar closed."""
+        closed = False
+        for row in sorted(rows, key=lambda r: int(r[0])):
+            closed |= self.buffers[symbol].upsert(row)
+        if closed:
+            await self._notify(symbol)
+
+    async def _gap_fill(self):
+        results = await asyncio.gather(*(self.backfill(symbol) for symbol in self.symbols), return_exceptions=True)
+        for symbol, rows in zip(self.symbols, results):
+            if isinstance(rows, Exception) or rows is None:
+                logging.error(f"Backfill failed for {symbol}: {rows!r}")
+                continue
+            await self._apply_rows(symbol, rows)
+
+    async def _keepalive(self, ws):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send("ping")
+
+    async def _consume(self, ws):
+        subscribe = {"op": "subscribe", "args": [{"channel": f"candle{self.timeframe}", "instId": s} for s in self.symbols]}
+        await ws.send(json.dumps(subscribe))
+        await self._gap_fill()
+        async for message in ws:
+            if message == "pong":
+                continue
+            payload = json.loads(message)
+            symbol = payload.get("arg", {}).get("instId")
+            if symbol in self.buffers and "data" in payload:
+                await self._apply_rows(symbol, payload["data"])
+
+    async def run(self, max_reconnects=None):
+        """Stream forever, reconnecting with exponential backoff; returns after max_reconnects if set."""
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=None) as ws:
+                    backoff = 1
+                    keepalive = asyncio.create_task(self._keepalive(ws))
+                    try:
+                        await self._consume(ws)
+                    finally:
+                        keepalive.cancel()
+            except (websockets.ConnectionClosed, OSError) as e:
+                logging.warning(f"WebSocket disconnected ({e!r}); reconnecting in {backoff}s")
+            self.reconnects += 1
+            if max_reconnects is not None and self.reconnects > max_reconnects:
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)